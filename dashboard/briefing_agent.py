@@ -15,7 +15,9 @@ Events emitted:
 import sys
 import os
 import json
+import time
 import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -204,6 +206,61 @@ def build_tool_configs(conn_name, cfg, modules=None):
 
 # ── Phase 1: Gather data from all connected connectors ───────────
 
+def _gather_connector(info, cfg, tool_configs):
+    """Run one connector's briefing tools and return its result entries."""
+    module = info["module"]
+    accounts = info["accounts"]
+    conn_data = []
+    for tc in tool_configs:
+        tool_name = tc["tool"]
+        args = dict(tc["args"])
+
+        # Apply max_results override from user config
+        user_max = cfg.get("max_results")
+        if user_max is not None:
+            if "max_results" in args:
+                args["max_results"] = user_max
+            elif "limit" in args:
+                args["limit"] = user_max
+
+        # For multi-account connectors, call each account
+        if info["supports_multi"] and len(accounts) > 1:
+            for acct in accounts:
+                call_args = {**args, "account": acct["id"]}
+                try:
+                    result = _call_tool(module, tool_name, call_args, accounts)
+                    conn_data.append({
+                        "tool": tool_name,
+                        "account": acct.get("label", acct["id"]),
+                        "result": result,
+                    })
+                except Exception as e:
+                    conn_data.append({"tool": tool_name, "account": acct["id"], "error": str(e)})
+        else:
+            try:
+                result = _call_tool(module, tool_name, args, accounts)
+                conn_data.append({"tool": tool_name, "result": result})
+            except Exception as e:
+                conn_data.append({"tool": tool_name, "error": str(e)})
+    return conn_data
+
+
+def _count_items(conn_data):
+    """Count gathered items for the progress event."""
+    total_items = 0
+    for d in conn_data:
+        r = d.get("result", "")
+        if isinstance(r, str):
+            try:
+                parsed = json.loads(r)
+                if isinstance(parsed, list):
+                    total_items += len(parsed)
+            except (json.JSONDecodeError, TypeError):
+                if r and not r.startswith("Error") and r != "No recent messages.":
+                    total_items += 1
+    return total_items
+
+
 def gather_data(connectors, connector_configs=None):
     """Call read-only tools on each connected connector. Returns raw data dict."""
     import tool_cache
@@ -212,17 +269,20 @@ def gather_data(connectors, connector_configs=None):
     if connector_configs is None:
         connector_configs = {}
 
-    # Check briefing-level cache
+    # Check briefing-level cache (the per-connector config decides which
+    # tools run and with what limits, so it is part of the key)
     cache_key = hashlib.md5(
-        json.dumps(sorted(connectors.keys())).encode()
+        json.dumps([sorted(connectors.keys()), connector_configs], sort_keys=True, default=str).encode()
     ).hexdigest()
     cached = tool_cache.get_briefing(cache_key)
     if cached is not None:
         emit({"type": "thinking", "text": "Using cached briefing data..."})
         return cached
 
-    gathered = {}
-
+    # Resolve each connector's tool list up front (cheap), then fetch all
+    # connectors concurrently: gather time is the slowest service, not the sum
+    all_modules = {cn: ci["module"] for cn, ci in connectors.items()}
+    jobs = {}
     for conn_name, info in connectors.items():
         cfg = connector_configs.get(conn_name, {})
 
@@ -230,65 +290,30 @@ def gather_data(connectors, connector_configs=None):
         if cfg.get("enabled") is False:
             continue
 
-        module = info["module"]
-        accounts = info["accounts"]
-        # Build module lookup for resolvers that need cross-connector access
-        all_modules = {cn: ci["module"] for cn, ci in connectors.items()}
         tool_configs = build_tool_configs(conn_name, cfg, modules=all_modules)
+        if tool_configs:
+            jobs[conn_name] = (info, cfg, tool_configs)
 
-        if not tool_configs:
-            continue
-
-        emit({"type": "thinking", "text": f"Checking {conn_name}..."})
-
-        conn_data = []
-        for tc in tool_configs:
-            tool_name = tc["tool"]
-            args = dict(tc["args"])
-
-            # Apply max_results override from user config
-            user_max = cfg.get("max_results")
-            if user_max is not None:
-                if "max_results" in args:
-                    args["max_results"] = user_max
-                elif "limit" in args:
-                    args["limit"] = user_max
-
-            # For multi-account connectors, call each account
-            if info["supports_multi"] and len(accounts) > 1:
-                for acct in accounts:
-                    call_args = {**args, "account": acct["id"]}
-                    try:
-                        result = _call_tool(module, tool_name, call_args, accounts)
-                        conn_data.append({
-                            "tool": tool_name,
-                            "account": acct.get("label", acct["id"]),
-                            "result": result,
-                        })
-                    except Exception as e:
-                        conn_data.append({"tool": tool_name, "account": acct["id"], "error": str(e)})
-            else:
-                try:
-                    result = _call_tool(module, tool_name, args, accounts)
-                    conn_data.append({"tool": tool_name, "result": result})
-                except Exception as e:
-                    conn_data.append({"tool": tool_name, "error": str(e)})
-
-        # Count items for progress
-        total_items = 0
-        for d in conn_data:
-            r = d.get("result", "")
-            if isinstance(r, str):
-                try:
-                    parsed = json.loads(r)
-                    if isinstance(parsed, list):
-                        total_items += len(parsed)
-                except (json.JSONDecodeError, TypeError):
-                    if r and not r.startswith("Error") and r != "No recent messages.":
-                        total_items += 1
-
-        emit({"type": "gather", "connector": conn_name, "tool": tool_configs[0]["tool"], "count": total_items})
-        gathered[conn_name] = conn_data
+    gathered = {}
+    if jobs:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = {}
+            for conn_name, (info, cfg, tool_configs) in jobs.items():
+                emit({"type": "thinking", "text": f"Checking {conn_name}..."})
+                futures[pool.submit(_gather_connector, info, cfg, tool_configs)] = conn_name
+
+            for future in as_completed(futures):
+                conn_name = futures[future]
+                conn_data = future.result()
+                # All connectors start together, so time since start is this one's latency
+                emit({"type": "gather", "connector": conn_name,
+                      "tool": jobs[conn_name][2][0]["tool"], "count": _count_items(conn_data),
+                      "ms": round((time.monotonic() - started) * 1000)})
+                gathered[conn_name] = conn_data
+
+        # Keep connector order stable for the prompt and the cache
+        gathered = {cn: gathered[cn] for cn in jobs}
 
     # Cache the full briefing result
     tool_cache.put_briefing(cache_key, gathered)
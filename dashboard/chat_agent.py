@@ -3,11 +3,13 @@ ClawFounder — Chat Agent (JSONL streaming)
 
 Reads a JSON request from stdin, runs an agentic loop with the chosen LLM,
 and outputs JSONL events to stdout for the dashboard to consume via SSE.
+When chat_agent_server.py is running, the request is forwarded to it instead
+so imports, clients and caches stay warm between chats.
 
 Events emitted:
   {"type": "thinking",    "text": "..."}
-  {"type": "tool_call",   "tool": "...", "connector": "...", "args": {...}}
-  {"type": "tool_result", "tool": "...", "result": "...", "truncated": bool}
+  {"type": "tool_call",   "tool": "...", "connector": "...", "args": {...}, "call_id": int}
+  {"type": "tool_result", "tool": "...", "result": "...", "truncated": bool, "call_id": int}
   {"type": "text",        "text": "..."}
   {"type": "error",       "error": "..."}
   {"type": "done"}
@@ -16,23 +18,184 @@ Events emitted:
 import sys
 import os
 import json
-import copy
+import time
+import atexit
+import threading
+import itertools
+import reprlib
+import contextvars
+import importlib
 import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson parses bytes directly (no decode round-trip) and is 2-3x faster
+_json_loads = orjson.loads if orjson else json.loads
+
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-try:
-    from dotenv import load_dotenv
-    load_dotenv(PROJECT_ROOT / ".env")
-except ImportError:
-    pass
+# server.js already merges .env into our environment (and says so); only
+# parse it ourselves — and import python-dotenv — when run some other way
+if not os.environ.get("CLAWFOUNDER_ENV_MERGED"):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(PROJECT_ROOT / ".env")
+    except ImportError:
+        pass
+
+
+def _json_body(obj):
+    """Serialize a request body to UTF-8 JSON bytes (orjson when available)."""
+    if orjson:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    return json.dumps(obj).encode()
+
+
+class _JsonlWriter:
+    """Coalesces JSONL events into as few write()+flush() syscalls as possible.
+
+    Events are appended to an in-memory buffer and flushed by a background
+    thread `window` seconds after the first pending event, as soon as
+    `max_buffer` bytes accumulate, or immediately for urgent events — so the
+    SSE stream stays live while bursts of tool/text events share a syscall.
+    """
+
+    def __init__(self, stream, max_buffer=64 * 1024, window=0.001):
+        self._stream = stream
+        self._max_buffer = max_buffer
+        self._window = window
+        self._buf = bytearray()
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._closed = False
+        threading.Thread(target=self._run, name="jsonl-flush", daemon=True).start()
+
+    def write(self, data, urgent=False):
+        with self._lock:
+            self._buf += data
+            if urgent or len(self._buf) >= self._max_buffer:
+                self._flush_locked()
+                return
+        self._pending.set()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buf:
+            self._stream.write(self._buf)
+            self._stream.flush()
+            self._buf.clear()
+
+    def close(self):
+        """Flush what's left and stop the flusher thread."""
+        self._closed = True
+        self._pending.set()
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._pending.wait()
+            time.sleep(self._window)
+            self._pending.clear()
+            try:
+                self.flush()
+            except OSError:
+                pass  # Reader went away (dashboard disconnected)
+
+
+# Terminal events close the dashboard's stream, so they are never dropped
+_TERMINAL_EVENTS = frozenset(("error", "done"))
+# Flushed immediately rather than waiting for the window: terminal events, and
+# tool boundaries so the UI shows a call starting/finishing while the tool runs
+_URGENT_EVENTS = _TERMINAL_EVENTS | {"tool_call", "tool_result"}
+
+
+class _TextStreamAdapter:
+    """Bytes-in facade for a text-only stdout (no .buffer), e.g. when embedded or replaced."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, data):
+        self._stream.write(bytes(data).decode())
+
+    def flush(self):
+        self._stream.flush()
+
+
+_out = getattr(sys.stdout, "buffer", None)
+_stdout = _JsonlWriter(_out if _out is not None else _TextStreamAdapter(sys.stdout))
+atexit.register(_stdout.flush)
+
+# Where emit() writes for the current request: stdout, or the client connection
+# when serving from chat_agent_server.py (set per request by run_request)
+_OUTPUT = contextvars.ContextVar("clawfounder_output", default=None)
+
+
+def _dumps_line(event):
+    """Serialize an event to one ASCII JSONL line (bytes)."""
+    # Non-ASCII top-level text goes straight to json.dumps rather than through
+    # orjson first; the isascii() check below still catches nested values
+    if orjson and all(v.isascii() for v in event.values() if isinstance(v, str)):
+        try:
+            line = orjson.dumps(event, default=str,
+                                option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+            # server.js decodes each stdout chunk separately, so keep the stream
+            # ASCII-only (like json.dumps) — a multi-byte char split across two
+            # pipe reads would otherwise be mangled.
+            if line.isascii():
+                return line
+        except TypeError:
+            pass  # e.g. ints wider than 64 bits — let stdlib json handle it
+    return (json.dumps(event, default=str) + "\n").encode()
+
+
+def _drop_events():
+    """Event types to drop at the source, e.g. CLAWFOUNDER_DROP_EVENTS=thinking,tool_call.
+
+    error/done are never dropped — the dashboard needs them to close the stream.
+    """
+    raw = os.environ.get("CLAWFOUNDER_DROP_EVENTS", "")
+    return frozenset(t.strip() for t in raw.split(",") if t.strip()) - _TERMINAL_EVENTS
+
+
+# Per request (set by run_request from that request's environment), so
+# concurrent chats in the daemon never share a drop set
+_EMIT_DROP = contextvars.ContextVar("clawfounder_drop_events", default=_drop_events())
 
 
 def emit(event):
-    """Write a JSONL event to stdout."""
-    print(json.dumps(event, default=str), flush=True)
+    """Write a JSONL event to stdout (buffered; see _JsonlWriter)."""
+    drop = _EMIT_DROP.get()
+    if drop and event.get("type") in drop:
+        return
+    (_OUTPUT.get() or _stdout).write(_dumps_line(event), urgent=event.get("type") in _URGENT_EVENTS)
+
+
+def emit_text(text):
+    """emit() for a text delta — the per-token hot path.
+
+    Same bytes as emit({"type": "text", "text": text}), but only the text is
+    serialized; the envelope is a constant.
+    """
+    if "text" in _EMIT_DROP.get():
+        return
+    if orjson and text.isascii():
+        line = b'{"type":"text","text":' + orjson.dumps(text) + b'}\n'
+    else:
+        line = (json.dumps({"type": "text", "text": text}) + "\n").encode()
+    (_OUTPUT.get() or _stdout).write(line)
 
 
 def _log(msg):
@@ -40,70 +203,357 @@ def _log(msg):
     print(f"[chat] {msg}", file=sys.stderr, flush=True)
 
 
+def _env_int(name, default, minimum=1):
+    """Integer setting from the environment; unset, blank or invalid means `default`."""
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(minimum, int(raw))
+    except ValueError:
+        _log(f"Ignoring {name}={raw!r} (not an integer), using {default}")
+        return default
+
+
 # ── Load connectors ─────────────────────────────────────────────
 
+# Parsed accounts.json as ((st_mtime_ns, st_size), registry)
+_REG_CACHE = None
+
+
 def _read_accounts_registry():
-    """Read the accounts registry from ~/.clawfounder/accounts.json."""
+    """Read the accounts registry from ~/.clawfounder/accounts.json.
+
+    The parsed dict is reused until the file's mtime or size changes.
+    """
+    global _REG_CACHE
     accounts_file = Path.home() / ".clawfounder" / "accounts.json"
-    if accounts_file.exists():
-        try:
-            return json.loads(accounts_file.read_text())
-        except Exception:
-            pass
-    return {"version": 1, "accounts": {}}
+    try:
+        st = accounts_file.stat()
+    except OSError:
+        return {"version": 1, "accounts": {}}
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _REG_CACHE and _REG_CACHE[0] == stamp:
+        return _REG_CACHE[1]
+    try:
+        registry = _json_loads(accounts_file.read_bytes())
+    except Exception:
+        return {"version": 1, "accounts": {}}
+    _REG_CACHE = (stamp, registry)
+    return registry
+
+
+# One JSON index of every connector's TOOLS, so a connector's module only has
+# to be executed when one of its tools is actually called
+_CONNECTOR_INDEX = Path.home() / ".clawfounder" / "cache" / "connectors.json"
+
+
+class _LazyConnector:
+    """Stand-in for a connector module that defers exec_module until first use.
+
+    TOOLS and SUPPORTS_MULTI_ACCOUNT come from the connector index; any other
+    attribute (handle, is_connected, ...) loads the real module.
+    """
+
+    def __init__(self, spec, tools, supports_multi):
+        # Per instance, so loading one connector never waits on another's import
+        self._lock = threading.Lock()
+        self._spec = spec
+        self._module = None
+        self.TOOLS = tools
+        self.SUPPORTS_MULTI_ACCOUNT = supports_multi
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = _exec_connector(self._spec)
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+
+# connector.py stamp each module in sys.modules was executed from
+_CONNECTOR_STAMPS = {}
+
+
+def _exec_connector(spec):
+    """Execute a connector module, reusing it via sys.modules until connector.py changes."""
+    stamp = _connector_stamp(Path(spec.origin))
+    module = sys.modules.get(spec.name)
+    if module is None or _CONNECTOR_STAMPS.get(spec.name) != stamp:
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[spec.name] = module
+        _CONNECTOR_STAMPS[spec.name] = stamp
+    return module
+
+
+def _connector_stamp(connector_file):
+    st = connector_file.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _read_connector_index():
+    """Return {name: {"stamp", "tools", "supports_multi", "has_is_connected"}}."""
+    try:
+        return _json_loads(_CONNECTOR_INDEX.read_bytes())
+    except Exception:
+        return {}
+
+
+def _index_entry(connector_file, module):
+    return {
+        "stamp": _connector_stamp(connector_file),
+        "tools": module.TOOLS,
+        "supports_multi": bool(getattr(module, "SUPPORTS_MULTI_ACCOUNT", False)),
+        "has_is_connected": callable(getattr(module, "is_connected", None)),
+    }
+
+
+def _write_connector_index(index):
+    # Written through a private temp file and swapped in: the daemon and
+    # one-shot runs may write the index at the same time
+    import tempfile
+
+    tmp = None
+    try:
+        _CONNECTOR_INDEX.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=_CONNECTOR_INDEX.parent, suffix=".tmp", delete=False) as f:
+            tmp = f.name
+            json.dump(index, f)
+        os.replace(tmp, _CONNECTOR_INDEX)
+    except Exception:
+        # Index is best-effort; next run just loads eagerly again
+        if tmp:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+# Folder prefixes that are never connectors (_template, .cache, ...)
+_SKIP_PREFIXES = ("_", ".")
+
+# Sorted connector folders as (connectors_dir st_mtime_ns, (Path, ...)); adding
+# or removing a folder bumps the directory mtime
+_CONNECTOR_FOLDERS = None
+
+
+def _connector_folders(connectors_dir):
+    """Sorted candidate connector folders, rescanned only when the dir changes."""
+    global _CONNECTOR_FOLDERS
+    mtime = connectors_dir.stat().st_mtime_ns
+    if _CONNECTOR_FOLDERS and _CONNECTOR_FOLDERS[0] == mtime:
+        return _CONNECTOR_FOLDERS[1]
+    # scandir's DirEntry.is_dir() uses the d_type from readdir — no stat per entry
+    with os.scandir(connectors_dir) as entries:
+        folders = tuple(sorted(
+            Path(e.path) for e in entries
+            if e.is_dir() and not e.name.startswith(_SKIP_PREFIXES)
+        ))
+    _CONNECTOR_FOLDERS = (mtime, folders)
+    return folders
+
+
+# Last load_all_connectors() result as (key, monotonic time, connectors). The
+# key covers accounts.json and the connectors dir; the short TTL bounds how long
+# a legacy is_connected() answer (token files, env) can go stale.
+_LOADED_CONNECTORS = None
+_LOADED_CONNECTORS_TTL = 30  # seconds
 
 
 def load_all_connectors():
+    """Load all connectors, reusing the previous result while nothing has changed.
+
+    See _load_all_connectors for the return shape.
+    """
+    global _LOADED_CONNECTORS
+    connectors_dir = PROJECT_ROOT / "connectors"
+    key = (_accounts_mtime(), connectors_dir.stat().st_mtime_ns)
+    if _LOADED_CONNECTORS:
+        cached_key, loaded_at, connectors = _LOADED_CONNECTORS
+        if cached_key == key and time.monotonic() - loaded_at < _LOADED_CONNECTORS_TTL:
+            return connectors
+    connectors = _load_all_connectors()
+    _LOADED_CONNECTORS = (key, time.monotonic(), connectors)
+    return connectors
+
+
+def _forget_env_caches():
+    """Drop the cached results that depend on os.environ (connector creds, identity).
+
+    Neither cache key covers the environment, so the daemon calls this
+    whenever it adopts a client environment that differs from its own.
+    """
+    global _LOADED_CONNECTORS
+    _LOADED_CONNECTORS = None
+    _SYS_PROMPT_CACHE.clear()
+
+
+def _load_all_connectors():
     """Load all connectors that have their deps available.
 
     Returns a dict of {conn_name: {"module": module, "accounts": [...], "supports_multi": bool}}.
+
+    Connectors with an up-to-date entry in the connector index get a
+    _LazyConnector instead of an executed module, unless their legacy
+    is_connected() check has to run.
     """
     connectors_dir = PROJECT_ROOT / "connectors"
     registry = _read_accounts_registry()
+    index = _read_connector_index()
+    index_dirty = False
     loaded = {}
 
-    for folder in sorted(connectors_dir.iterdir()):
-        if not folder.is_dir() or folder.name.startswith("_") or folder.name.startswith("."):
-            continue
+    for folder in _connector_folders(connectors_dir):
+        info, index_entry = _load_connector(folder, registry, index)
+        if index_entry is not None:
+            index[folder.name] = index_entry
+            index_dirty = True
+        if info is not None:
+            loaded[folder.name] = info
+
+    if index_dirty:
+        _write_connector_index(index)
+    return loaded
 
+
+def _load_connector(folder, registry, index):
+    """Load one connector folder.
+
+    Returns (info or None, new connector-index entry or None); `index` is only read.
+    """
+    index_entry = None
+    try:
+        # Checked per load rather than cached with the folder list: writing
+        # connector.py into an existing folder doesn't touch the dir mtime
+        connector_file = folder / "connector.py"
         try:
-            spec = importlib.util.spec_from_file_location(
-                f"connectors.{folder.name}.connector",
-                folder / "connector.py",
-                submodule_search_locations=[str(folder)],
-            )
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            stamp = _connector_stamp(connector_file)
+        except OSError:
+            return None, None  # Not a connector (no connector.py)
+        spec = importlib.util.spec_from_file_location(
+            f"connectors.{folder.name}.connector",
+            connector_file,
+            submodule_search_locations=[str(folder)],
+        )
+        reg_accounts = registry.get("accounts", {}).get(folder.name, [])
+        # Filter to only enabled accounts
+        enabled_accounts = [a for a in reg_accounts if a.get("enabled", True)]
+
+        # Unless is_connected() has to run, the module can wait until a tool is called
+        entry = index.get(folder.name)
+        if entry and entry.get("stamp") != stamp:
+            entry = None
+        if entry and (enabled_accounts or not entry.get("has_is_connected", True)):
+            module = _LazyConnector(spec, entry["tools"], entry["supports_multi"])
+        else:
+            module = _exec_connector(spec)
 
             if not (hasattr(module, "TOOLS") and hasattr(module, "handle")):
-                continue
+                return None, None
+            if not entry:
+                index_entry = _index_entry(connector_file, module)
+
+        supports_multi = getattr(module, "SUPPORTS_MULTI_ACCOUNT", False)
+
+        # A lazy module only gets here without accounts when the index says it
+        # has no is_connected(); probing for one would execute it
+        if not enabled_accounts and not isinstance(module, _LazyConnector):
+            # Fall back to legacy is_connected() check when no registry entry
+            if hasattr(module, "is_connected") and callable(module.is_connected):
+                if not module.is_connected():
+                    return None, index_entry
+        return {
+            "module": module,
+            "accounts": enabled_accounts,
+            "supports_multi": supports_multi,
+        }, index_entry
+    except Exception:
+        # Skip connectors with missing deps; an is_connected() failure after
+        # a fresh exec still leaves the index entry it produced
+        return None, index_entry
 
-            supports_multi = getattr(module, "SUPPORTS_MULTI_ACCOUNT", False)
-            reg_accounts = registry.get("accounts", {}).get(folder.name, [])
-            # Filter to only enabled accounts
-            enabled_accounts = [a for a in reg_accounts if a.get("enabled", True)]
-
-            if enabled_accounts:
-                # At least one enabled account exists in the registry
-                loaded[folder.name] = {
-                    "module": module,
-                    "accounts": enabled_accounts,
-                    "supports_multi": supports_multi,
-                }
-            else:
-                # Fall back to legacy is_connected() check when no registry entry
-                if hasattr(module, "is_connected") and callable(module.is_connected):
-                    if not module.is_connected():
-                        continue
-                loaded[folder.name] = {
-                    "module": module,
-                    "accounts": [],
-                    "supports_multi": supports_multi,
-                }
-        except Exception:
-            pass  # Skip connectors with missing deps
 
-    return loaded
+def _accounts_mtime():
+    """mtime of ~/.clawfounder/accounts.json (None when missing)."""
+    try:
+        return (Path.home() / ".clawfounder" / "accounts.json").stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+# Account-injected tool defs as (source tool, injected def), keyed by
+# (conn_name, tool_name, ((id, label), ...))
+_ACCOUNT_TOOL_DEFS = {}
+# build_system_prompt results, keyed by _prompt_key
+_SYS_PROMPT_CACHE = {}
+
+# Entries kept by the in-memory caches whose keys include the routed tool
+# subset; without a bound a long-lived daemon would keep one per subset
+_MEMO_LIMIT = 32
+
+
+def _memo_put(cache, key, value):
+    """cache[key] = value, evicting the oldest entries beyond _MEMO_LIMIT."""
+    while len(cache) >= _MEMO_LIMIT:
+        try:
+            cache.pop(next(iter(cache)), None)
+        except (StopIteration, RuntimeError):
+            break  # Another request emptied or resized it concurrently
+    cache[key] = value
+    return value
+
+
+def _with_account_param(conn_name, tool, accounts):
+    """Return `tool` with a required `account` enum parameter injected (memoized)."""
+    def_key = (conn_name, tool["name"], tuple((a["id"], a.get("label", a["id"])) for a in accounts))
+    cached = _ACCOUNT_TOOL_DEFS.get(def_key)
+    # A reloaded connector.py brings new TOOLS dicts, which must not reuse the old schema
+    if cached is not None and cached[0] is tool:
+        return cached[1]
+
+    # Copy only the levels we touch
+    params = tool.get("parameters", {"type": "object", "properties": {}})
+    required = params.get("required", [])
+    account_ids = [a["id"] for a in accounts]
+    desc_parts = ", ".join(f'"{aid}" ({label})' for aid, label in def_key[2])
+    tool_def = {
+        **tool,
+        "parameters": {
+            **params,
+            "properties": {
+                **params.get("properties", {}),
+                "account": {
+                    "type": "string",
+                    "enum": account_ids,
+                    "description": f"Which account to use: {desc_parts}",
+                },
+            },
+            "required": required if "account" in required else [*required, "account"],
+        },
+    }
+    _ACCOUNT_TOOL_DEFS[def_key] = (tool, tool_def)
+    return tool_def
+
+
+def _connector_tool_defs(conn_name, info):
+    """One connector's tool defs (account param injected if needed), cached on `info`.
+
+    `info` comes from load_all_connectors, which rebuilds it whenever the
+    accounts registry changes, so the cache shares its lifetime.
+    """
+    tool_defs = info.get("tool_defs")
+    if tool_defs is None:
+        accounts = info["accounts"]
+        if info["supports_multi"] and len(accounts) > 1:
+            tool_defs = [_with_account_param(conn_name, tool, accounts) for tool in info["module"].TOOLS]
+        else:
+            tool_defs = list(info["module"].TOOLS)
+        info["tool_defs"] = tool_defs
+    return tool_defs
 
 
 def build_tools_and_map(connectors, allowed_tools=None):
@@ -117,51 +567,148 @@ def build_tools_and_map(connectors, allowed_tools=None):
 
     Returns (all_tools, tool_map) where:
       all_tools = list of tool definition dicts
-      tool_map = {tool_name: (conn_name, module, accounts)}
+      tool_map = {tool_name: (conn_name, module, accounts, supports_multi)}
     """
     all_tools = []
     tool_map = {}
 
-    for conn_name, info in connectors.items():
-        module = info["module"]
-        accounts = info["accounts"]
-        supports_multi = info["supports_multi"]
-
-        for tool in module.TOOLS:
+    # Canonical connector order keeps the tool list — and so the provider-side
+    # prompt prefix cache — identical across runs regardless of dict order
+    for conn_name, info in sorted(connectors.items()):
+        entry = (conn_name, info["module"], info["accounts"], info["supports_multi"])
+        for tool in _connector_tool_defs(conn_name, info):
             if allowed_tools and tool["name"] not in allowed_tools:
                 continue
+            all_tools.append(tool)
+            tool_map[tool["name"]] = entry
 
-            if supports_multi and len(accounts) > 1:
-                # Deep copy and inject `account` parameter
-                tool_def = copy.deepcopy(tool)
-                params = tool_def.setdefault("parameters", {"type": "object", "properties": {}})
-                props = params.setdefault("properties", {})
-                required = params.setdefault("required", [])
-
-                account_ids = [a["id"] for a in accounts]
-                account_labels = {a["id"]: a.get("label", a["id"]) for a in accounts}
-                desc_parts = ", ".join(f'"{aid}" ({account_labels[aid]})' for aid in account_ids)
-                props["account"] = {
-                    "type": "string",
-                    "enum": account_ids,
-                    "description": f"Which account to use: {desc_parts}",
-                }
-                if "account" not in required:
-                    required.append("account")
+    return all_tools, tool_map
 
-                all_tools.append(tool_def)
-            else:
-                all_tools.append(tool)
 
-            tool_map[tool["name"]] = (conn_name, module, accounts)
+# Persona + rules section of the system prompt — identical for every request,
+# so it is joined once at import instead of on every build_system_prompt call.
+_SYSTEM_PROMPT_PREFIX = "\n".join([
+    "You are ClawFounder 🦀 — a personal AI agent that takes real actions "
+    "using connected services. Be concise and helpful.",
+    "",
+    "## CORE BEHAVIOR — PREDICT, VERIFY, EXECUTE",
+    "",
+    "You operate in a 3-step loop:",
+    "",
+    "### Step 1: PREDICT — Do the research silently",
+    "When the user gives you a task, IMMEDIATELY use tools to gather everything you need. "
+    "Never ask the user for information you can look up yourself. "
+    "If the user says 'email Shuban', search all connected email accounts for Shuban's address. "
+    "If the user says 'check my emails', read them across all accounts. "
+    "Your first response must be tool calls — not questions.",
+    "",
+    "### Step 2: VERIFY — Show the user what you plan to do and get confirmation",
+    "Before executing any action that SENDS, CREATES, MODIFIES, or DELETES something "
+    "(sending emails, creating issues, inserting data, etc.), "
+    "present a clear summary of what you're about to do and ask for confirmation. Example:",
+    "",
+    '  "Here\'s what I\'ll send from both accounts to shuban@email.com:"',
+    '  "**From kaziabdullah61@gmail.com:**"',
+    '  "> Subject: ..."',
+    '  "> Body preview..."',
+    '  "**From akaziwork61@gmail.com:**"',
+    '  "> Subject: ..."',
+    '  "> Body preview..."',
+    '  "Send both?"',
+    "",
+    "Keep the preview concise. For short emails show the full body. For long ones, show a summary.",
+    "READ-ONLY actions (searching, listing, reading emails) do NOT need confirmation — just do them.",
+    "",
+    "### Step 3: EXECUTE — Act on confirmation",
+    "When the user confirms (yes, yep, send it, go, do it, etc.), execute immediately. "
+    "If they want changes, adjust and show the updated plan.",
+    "",
+    "## Rules",
+    "1. ALWAYS use tools to answer questions — never guess or say you can't when a tool exists.",
+    "2. When the user asks for a summary, briefing, or 'what's going on', use the get_briefing tool.",
+    "3. When the user mentions a person, project, or topic, use search_knowledge FIRST to check for "
+    "relevant context across all services before making direct tool calls.",
+    "4. When the user asks about emails, files, data, etc. — call the appropriate tool FIRST, then answer.",
+    "5. If a tool returns an error, report it honestly and suggest next steps.",
+    "6. Be brief. Don't narrate every step — just do it.",
+    "7. If multiple email accounts are connected, search ALL of them when looking something up.",
+    "8. When the user mentions a person by name, search your emails to find their address. "
+    "The search results include `to` and `from` fields — use those.",
+    "",
+    "## Email Persona — CRITICAL",
+    "You are ghostwriting on behalf of the user. Every email you compose, reply to, or draft "
+    "must read as if the user typed it themselves.",
+    "- Write in first person. You ARE the user.",
+    "- Never mention you are an AI, an assistant, or ClawFounder.",
+    "- Never say things like 'I've drafted this for you' or 'Here's what I wrote' in the email body itself. "
+    "Just write the email directly.",
+    "- Match context: professional and polished for work, relaxed and natural for personal.",
+    "- Keep it short. Real people write short emails.",
+])
+
+
+# instructions.md contents, keyed by path → ((mtime_ns, size), stripped text)
+_INSTRUCTIONS_CACHE = {}
+
+
+def _read_instructions(instructions_file):
+    """Return a connector's instructions.md, re-reading it only when its stat changes.
+
+    Raises FileNotFoundError when the connector has none.
+    """
+    st = instructions_file.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _INSTRUCTIONS_CACHE.get(instructions_file)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    content = instructions_file.read_bytes().decode().strip()
+    _INSTRUCTIONS_CACHE[instructions_file] = (stamp, content)
+    return content
+
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
 
-    return all_tools, tool_map
 
+def _prompt_key(connectors, active=None):
+    """Fingerprint of everything build_system_prompt reads, as a JSON string.
 
-def build_system_prompt(connectors):
-    """Build a rich system prompt from the loaded connectors and their instructions."""
+    Covers the connector set + enabled accounts, the routed subset, accounts.json,
+    each instructions.md and the token files the user's name comes from.
+    """
+    connectors_dir = PROJECT_ROOT / "connectors"
+    clawfounder_dir = Path.home() / ".clawfounder"
+    entries = []
+    for name, info in sorted(connectors.items()):
+        accounts = info.get("accounts", []) if isinstance(info, dict) else []
+        entries.append([
+            name,
+            [[a.get("id"), a.get("label"), a.get("credential_file")] for a in accounts],
+            _mtime(connectors_dir / name / "instructions.md"),
+            [_mtime(clawfounder_dir / a["credential_file"]) for a in accounts if a.get("credential_file")],
+        ])
+    active = sorted(active) if active is not None else None
+    return json.dumps([entries, active, _accounts_mtime()])
+
+
+def build_system_prompt(connectors, active=None):
+    """Build a rich system prompt from the loaded connectors and their instructions.
+
+    `active` limits the Connected Services section to those connector names
+    (the ones the router kept); the user identity is always taken from all of them.
+    """
     connectors_dir = PROJECT_ROOT / "connectors"
 
+    # Reuse the prompt while its inputs are unchanged (the daemon serves many
+    # chats from one process; a one-shot run builds it once anyway)
+    key = _prompt_key(connectors, active)
+    cached = _SYS_PROMPT_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     # Detect user identity from connected email accounts & token files
     user_emails = []
     user_name = None
@@ -185,64 +732,7 @@ def build_system_prompt(connectors):
                     except Exception:
                         pass
 
-    lines = [
-        "You are ClawFounder 🦀 — a personal AI agent that takes real actions "
-        "using connected services. Be concise and helpful.",
-        "",
-        "## CORE BEHAVIOR — PREDICT, VERIFY, EXECUTE",
-        "",
-        "You operate in a 3-step loop:",
-        "",
-        "### Step 1: PREDICT — Do the research silently",
-        "When the user gives you a task, IMMEDIATELY use tools to gather everything you need. "
-        "Never ask the user for information you can look up yourself. "
-        "If the user says 'email Shuban', search all connected email accounts for Shuban's address. "
-        "If the user says 'check my emails', read them across all accounts. "
-        "Your first response must be tool calls — not questions.",
-        "",
-        "### Step 2: VERIFY — Show the user what you plan to do and get confirmation",
-        "Before executing any action that SENDS, CREATES, MODIFIES, or DELETES something "
-        "(sending emails, creating issues, inserting data, etc.), "
-        "present a clear summary of what you're about to do and ask for confirmation. Example:",
-        "",
-        '  "Here\'s what I\'ll send from both accounts to shuban@email.com:"',
-        '  "**From kaziabdullah61@gmail.com:**"',
-        '  "> Subject: ..."',
-        '  "> Body preview..."',
-        '  "**From akaziwork61@gmail.com:**"',
-        '  "> Subject: ..."',
-        '  "> Body preview..."',
-        '  "Send both?"',
-        "",
-        "Keep the preview concise. For short emails show the full body. For long ones, show a summary.",
-        "READ-ONLY actions (searching, listing, reading emails) do NOT need confirmation — just do them.",
-        "",
-        "### Step 3: EXECUTE — Act on confirmation",
-        "When the user confirms (yes, yep, send it, go, do it, etc.), execute immediately. "
-        "If they want changes, adjust and show the updated plan.",
-        "",
-        "## Rules",
-        "1. ALWAYS use tools to answer questions — never guess or say you can't when a tool exists.",
-        "2. When the user asks for a summary, briefing, or 'what's going on', use the get_briefing tool.",
-        "3. When the user mentions a person, project, or topic, use search_knowledge FIRST to check for "
-        "relevant context across all services before making direct tool calls.",
-        "4. When the user asks about emails, files, data, etc. — call the appropriate tool FIRST, then answer.",
-        "5. If a tool returns an error, report it honestly and suggest next steps.",
-        "6. Be brief. Don't narrate every step — just do it.",
-        "7. If multiple email accounts are connected, search ALL of them when looking something up.",
-        "8. When the user mentions a person by name, search your emails to find their address. "
-        "The search results include `to` and `from` fields — use those.",
-        "",
-        "## Email Persona — CRITICAL",
-        "You are ghostwriting on behalf of the user. Every email you compose, reply to, or draft "
-        "must read as if the user typed it themselves.",
-        "- Write in first person. You ARE the user.",
-        "- Never mention you are an AI, an assistant, or ClawFounder.",
-        "- Never say things like 'I've drafted this for you' or 'Here's what I wrote' in the email body itself. "
-        "Just write the email directly.",
-        "- Match context: professional and polished for work, relaxed and natural for personal.",
-        "- Keep it short. Real people write short emails.",
-    ]
+    lines = [_SYSTEM_PROMPT_PREFIX]
     if user_name:
         lines.append(f"- The user's name is **{user_name}**. Sign off naturally (e.g. 'Best,\\n{user_name}' or "
                       f"just '{user_name}' or no sign-off for casual quick replies).")
@@ -255,19 +745,19 @@ def build_system_prompt(connectors):
     lines.append("")
 
     # Include each connector's instructions.md (the source of truth for tool usage)
-    if connectors:
+    services = sorted(connectors.keys() if active is None else active & connectors.keys())
+    if services:
         lines.append("## Connected Services")
         lines.append("")
-        for conn_name in sorted(connectors.keys()):
-            instructions_file = connectors_dir / conn_name / "instructions.md"
-            if instructions_file.exists():
-                try:
-                    content = instructions_file.read_text().strip()
-                    lines.append(f"### {conn_name}")
-                    lines.append(content)
-                    lines.append("")
-                except Exception:
-                    pass
+        for conn_name in services:
+            try:
+                content = _read_instructions(connectors_dir / conn_name / "instructions.md")
+            except Exception:
+                content = None  # No (readable) instructions.md for this connector
+            if content is not None:
+                lines.append(f"### {conn_name}")
+                lines.append(content)
+                lines.append("")
 
             # If this connector has multiple enabled accounts, list them
             info = connectors[conn_name]
@@ -285,7 +775,7 @@ def build_system_prompt(connectors):
                 lines.append("")
 
         # If both email connectors are active, add disambiguation guidance
-        if "gmail" in connectors and "work_email" in connectors:
+        if "gmail" in services and "work_email" in services:
             lines.append("### Email Disambiguation")
             lines.append(
                 "The user has TWO email connector types connected: personal Gmail (`gmail_*` tools) "
@@ -297,13 +787,14 @@ def build_system_prompt(connectors):
             )
             lines.append("")
 
-    return "\n".join(lines)
+    prompt = "\n".join(lines)
+    return _memo_put(_SYS_PROMPT_CACHE, key, prompt)
 
 
 # ── Tool execution helper ────────────────────────────────────────
 
 # Read-only tools that are safe to cache
-_CACHEABLE_PREFIXES = (
+_CACHEABLE_PREFIXES = frozenset((
     "gmail_get_unread", "gmail_search", "gmail_read_email", "gmail_list_labels",
     "work_email_get_unread", "work_email_search", "work_email_read_email",
     "github_list_repos", "github_get_repo", "github_notifications", "github_list_prs",
@@ -312,14 +803,30 @@ _CACHEABLE_PREFIXES = (
     "github_get_file", "github_get_me", "github_list_tags", "github_list_gists",
     "yahoo_finance_quote", "yahoo_finance_history", "yahoo_finance_search",
     "telegram_get_updates",
-)
+))
+
+# Knowledge-base indexing runs off the critical path. Every job is kept: the
+# pool's workers are joined at interpreter exit, so a one-shot run drains the
+# queue after 'done' (server.js closes the chat on that event, not on exit).
+_INDEX_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="kb-index")
+
 
+def _index_async(*args):
+    """Queue a knowledge_base.index call without blocking the caller."""
+    import knowledge_base
+
+    try:
+        _INDEX_POOL.submit(knowledge_base.index, *args)  # never raises
+    except RuntimeError:  # pool already shut down at exit
+        knowledge_base.index(*args)
 
-def _call_tool(module, tool_name, args, accounts):
+
+def _call_tool(module, tool_name, args, accounts, supports_multi):
     """Call a connector's handle() with optional account_id routing + caching + knowledge indexing."""
     import tool_cache
-    import knowledge_base
 
+    # Popped from a copy: the provider loops replay `args` as the model's call
+    args = dict(args)
     account_id = args.pop("account", None)
     # Auto-select if only 1 account
     if account_id is None and len(accounts) == 1:
@@ -330,10 +837,9 @@ def _call_tool(module, tool_name, args, accounts):
     if tool_name in _CACHEABLE_PREFIXES:
         cached = tool_cache.get(tool_name, args, account_id=account_id, connector=connector)
         if cached is not None:
-            knowledge_base.index(connector, tool_name, cached, args, account_id)
+            _index_async(connector, tool_name, cached, args, account_id)
             return cached
 
-    supports_multi = getattr(module, "SUPPORTS_MULTI_ACCOUNT", False)
     if supports_multi and account_id:
         result = module.handle(tool_name, args, account_id=account_id)
     else:
@@ -345,7 +851,7 @@ def _call_tool(module, tool_name, args, accounts):
 
     # Index into knowledge base (fire-and-forget)
     if isinstance(result, str):
-        knowledge_base.index(connector, tool_name, result, args, account_id)
+        _index_async(connector, tool_name, result, args, account_id)
 
     return result
 
@@ -363,12 +869,23 @@ BRIEFING_TOOL_DEF = {
 }
 
 
+def _briefing_progress(event):
+    """Relay briefing_agent events, turning per-connector gather events into chat progress."""
+    if event.get("type") == "gather":
+        event = {
+            "type": "thinking",
+            "text": f"Got {event['connector']}: {event['count']} items ({event.get('ms', 0)} ms)",
+        }
+    emit(event)
+
+
 def _get_briefing(connectors):
     """Gather data from all connected services and return a summary."""
     briefing_path = Path(__file__).parent / "briefing_agent.py"
     spec = importlib.util.spec_from_file_location("briefing_agent", briefing_path)
     briefing_mod = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(briefing_mod)
+    briefing_mod.emit = _briefing_progress  # Route its progress events through our buffered stdout
 
     config_file = Path.home() / ".clawfounder" / "briefing_config.json"
     connector_configs = {}
@@ -380,71 +897,304 @@ def _get_briefing(connectors):
 
     gathered = briefing_mod.gather_data(connectors, connector_configs)
 
-    parts = []
-    for conn_name, data in gathered.items():
-        for item in data:
-            result = item.get("result", item.get("error", ""))
-            label = item.get("account", conn_name)
-            result_str = str(result)[:3000]
-            parts.append(f"[{conn_name}] {item.get('tool', '')} ({label}):\n{result_str}")
+    # This is the model's view of the data, so it gets str(result) like any
+    # other tool result; _preview's repr limits are only for the dashboard
+    summary = "\n\n".join(
+        f"[{conn_name}] {item.get('tool', '')} ({item.get('account', conn_name)}):\n"
+        f"{str(item.get('result', item.get('error', '')))[:3000]}"
+        for conn_name, data in gathered.items()
+        for item in data
+    )
+    return summary or "No data available from connected services."
 
-    return "\n\n".join(parts) if parts else "No data available from connected services."
 
+# ── Tool dispatch ────────────────────────────────────────────────
 
-# ── Tool router (LLM-powered) ────────────────────────────────────
+# Connector tools are mostly I/O-bound HTTP calls, so a turn's tool calls run
+# concurrently: latency is the slowest call rather than the sum of all of them.
+_MAX_TOOL_WORKERS = _env_int("CLAWFOUNDER_TOOL_WORKERS", 8)
+_TOOL_CALL_IDS = itertools.count(1)
+# tool_map entry for a name the model made up
+_UNKNOWN_TOOL = ("unknown", None, (), False)
+_INVALID_ARGS_RESULT = (
+    "Error: the tool arguments were not a complete JSON object, so the tool was not run. "
+    "Call it again with the full arguments."
+)
+# Shown when a provider stopped at its output limit partway through a tool call
+_TRUNCATED_TOOL_CALL_ERROR = (
+    "The model hit its output token limit while writing a tool call, so no tool was run. "
+    "Try asking for less at once."
+)
 
 
-# ── Provider: Gemini ─────────────────────────────────────────────
+def _dispatch_tool(tool_name, args, tool_map, connectors):
+    """Run one tool call (built-in or connector) and return its result.
 
-GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
+    `args` is None when the model's arguments could not be parsed; the tool is
+    then not run and the model gets an error it can recover from.
+    """
+    if args is None:
+        return _INVALID_ARGS_RESULT
+    _, module, accounts, supports_multi = tool_map.get(tool_name, _UNKNOWN_TOOL)
+
+    if tool_name == "get_briefing":
+        try:
+            return _get_briefing(connectors)
+        except Exception as e:
+            return f"Briefing error: {e}"
+    if tool_name == "search_knowledge":
+        try:
+            import knowledge_base
+            return knowledge_base.search(
+                args.get("query", ""),
+                connector=args.get("connector"),
+                max_results=args.get("max_results", 10),
+            )
+        except Exception as e:
+            return f"Knowledge search error: {e}"
+    if module:
+        try:
+            return _call_tool(module, tool_name, args, accounts, supports_multi)
+        except Exception as e:
+            return f"Tool error: {e}"
+    return f"Unknown tool: {tool_name}"
 
 
-def run_gemini(message, history, connectors):
-    from google import genai
-    from google.genai import types
+# Size-capped repr for container results, so a huge dict/list isn't fully
+# stringified just to keep its first 2000 characters
+_PREVIEW_REPR = reprlib.Repr()
+_PREVIEW_REPR.maxstring = _PREVIEW_REPR.maxother = 2000
+_PREVIEW_REPR.maxlist = _PREVIEW_REPR.maxtuple = _PREVIEW_REPR.maxdict = 100
+_PREVIEW_REPR.maxlevel = 8
 
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        emit({"type": "error", "error": "GEMINI_API_KEY not set. Get one from aistudio.google.com/apikey"})
-        return
 
-    client = genai.Client(api_key=api_key)
+def _preview(result, limit=2000):
+    """Dashboard preview of a tool result: (text[:limit], truncated flag).
 
-    # Smart tool routing — LLM picks relevant tools
+    The model still gets the full result; only the tool_result event is cut.
+    """
+    if isinstance(result, str):
+        text = result
+    elif isinstance(result, (dict, list, tuple)):
+        text = _PREVIEW_REPR.repr(result)
+    else:
+        text = str(result)
+    return text[:limit], len(text) > 500
+
+
+def _result_text(result):
+    """A tool result as the string OpenAI/Claude tool messages require."""
+    return result if isinstance(result, str) else json.dumps(result, default=str)
+
+
+def _run_tool_calls(calls, tool_map, connectors):
+    """Execute one turn's tool calls, concurrently when there are several.
+
+    `calls` is a list of (tool_name, args). A tool_call event is emitted for
+    every call up front and a tool_result event as each one finishes.
+    Returns the results in call order.
+    """
+    conn_names = [tool_map.get(name, _UNKNOWN_TOOL)[0] for name, _ in calls]
+    # Results can finish out of order; call_id lets the UI pair them up
+    call_ids = [next(_TOOL_CALL_IDS) for _ in calls]
+    for (tool_name, args), conn_name, call_id in zip(calls, conn_names, call_ids):
+        emit({"type": "tool_call", "tool": tool_name, "connector": conn_name, "args": args, "call_id": call_id})
+
+    def finished(i, result):
+        preview, truncated = _preview(result)
+        emit({
+            "type": "tool_result", "tool": calls[i][0], "connector": conn_names[i], "call_id": call_ids[i],
+            "result": preview, "truncated": truncated,
+        })
+
+    results = [None] * len(calls)
+    if len(calls) == 1:
+        results[0] = _dispatch_tool(calls[0][0], calls[0][1], tool_map, connectors)
+        finished(0, results[0])
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(_MAX_TOOL_WORKERS, len(calls))) as pool:
+        futures = {
+            # Each worker runs in a copy of this context so its emits reach this request's output
+            pool.submit(contextvars.copy_context().run, _dispatch_tool, tool_name, args, tool_map, connectors): i
+            for i, (tool_name, args) in enumerate(calls)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            finished(i, results[i])
+    return results
+
+
+# ── Provider tool declarations ───────────────────────────────────
+
+# Gemini tool declarations keyed by tool-set signature, so its pydantic
+# validation runs once per distinct set. The other providers' lists are plain
+# dicts, cheaper to rebuild than to key.
+_GEMINI_TOOLS_CACHE = {}
+
+
+def _tool_signature(all_tool_defs):
+    return tuple(
+        (t["name"], t["description"], json.dumps(t.get("parameters", {}), sort_keys=True))
+        for t in all_tool_defs
+    )
+
+
+def _gemini_tools(all_tool_defs):
+    """Return _build_gemini_tools(all_tool_defs), memoized on the tool-set signature."""
+    key = _tool_signature(all_tool_defs)
+    cached = _GEMINI_TOOLS_CACHE.get(key)
+    if cached is None:
+        cached = _memo_put(_GEMINI_TOOLS_CACHE, key, _build_gemini_tools(all_tool_defs))
+    return cached
+
+
+def _build_gemini_tools(all_tool_defs):
+    types = _genai_types()
+
+    gemini_fns = [
+        types.FunctionDeclaration(
+            name=tool["name"],
+            description=tool["description"],
+            parameters=tool.get("parameters", {}),
+        )
+        for tool in all_tool_defs
+    ]
+    return types.Tool(function_declarations=gemini_fns) if gemini_fns else None
+
+
+def _build_openai_tools(all_tool_defs):
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": tool["name"],
+                "description": tool["description"],
+                "parameters": tool.get("parameters", {"type": "object", "properties": {}}),
+            },
+        }
+        for tool in all_tool_defs
+    ]
+
+
+def _build_openai_responses_tools(all_tool_defs):
+    return [
+        {
+            "type": "function",
+            "name": tool["name"],
+            "description": tool["description"],
+            "parameters": tool.get("parameters", {"type": "object", "properties": {}}),
+        }
+        for tool in all_tool_defs
+    ]
+
+
+def _build_claude_tools(all_tool_defs):
+    return [
+        {
+            "name": tool["name"],
+            "description": tool["description"],
+            "input_schema": tool.get("parameters", {"type": "object", "properties": {}}),
+        }
+        for tool in all_tool_defs
+    ]
+
+
+# ── Tool router (LLM-powered) ────────────────────────────────────
+
+def _provider_setup(message, connectors, router_key):
+    """Route the message and build the tool list + system prompt for a provider run.
+
+    The router is an LLM call (~300-800ms), so it runs on a worker thread while
+    the full tool list is built here; its answer is then applied as a plain
+    name filter over the prebuilt list, and the system prompt only carries
+    instructions for the connectors that still have tools.
+
+    Returns (all_tool_defs, tool_map, system_prompt).
+    """
     import tool_router
-    allowed_tools = tool_router.route(message, connectors, api_key)
+    import knowledge_base
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        router_future = pool.submit(tool_router.route, message, connectors, router_key)
+        all_tool_defs, tool_map = build_tools_and_map(connectors)
+        allowed_tools = router_future.result()
+
     if allowed_tools:
         emit({"type": "thinking", "text": f"Routed to {len(allowed_tools)} tools"})
+        all_tool_defs = [t for t in all_tool_defs if t["name"] in allowed_tools]
+        tool_map = {name: entry for name, entry in tool_map.items() if name in allowed_tools}
+        system_prompt = build_system_prompt(connectors, {entry[0] for entry in tool_map.values()})
+    else:
+        system_prompt = build_system_prompt(connectors)
 
-    # Build tool declarations from connectors + briefing + knowledge
-    all_tool_defs, tool_map = build_tools_and_map(connectors, allowed_tools=allowed_tools)
+    # Built-in tools: briefing + knowledge search
     all_tool_defs.append(BRIEFING_TOOL_DEF)
-    tool_map["get_briefing"] = ("_briefing", None, [])
-
-    import knowledge_base
+    tool_map["get_briefing"] = ("_briefing", None, [], False)
     all_tool_defs.append(knowledge_base.KNOWLEDGE_TOOL_DEF)
-    tool_map["search_knowledge"] = ("_knowledge", None, [])
+    tool_map["search_knowledge"] = ("_knowledge", None, [], False)
 
-    gemini_fns = []
-    for tool in all_tool_defs:
-        gemini_fns.append(types.FunctionDeclaration(
-            name=tool["name"],
-            description=tool["description"],
-            parameters=tool.get("parameters", {}),
-        ))
+    return all_tool_defs, tool_map, system_prompt
+
+
+# ── Provider: Gemini ─────────────────────────────────────────────
+
+# google.genai.types, bound on first use. Importing google.genai at module
+# scope would add ~400ms to every cold start, including OpenAI/Claude runs.
+_GENAI_TYPES = None
+
+
+def _genai_types():
+    global _GENAI_TYPES
+    if _GENAI_TYPES is None:
+        from google.genai import types
+        _GENAI_TYPES = types
+    return _GENAI_TYPES
 
-    gemini_tools = types.Tool(function_declarations=gemini_fns) if gemini_fns else None
 
-    system = build_system_prompt(connectors)
+# genai.Client per API key — construction resolves endpoints/credentials and
+# owns the HTTP pool, so it is built once and reused across runs.
+_GEMINI_CLIENTS = {}
 
-    # Build conversation history
-    contents = []
-    for msg in history:
-        role = "user" if msg["role"] == "user" else "model"
-        contents.append(types.Content(
-            role=role,
+
+def _gemini_client(api_key):
+    client = _GEMINI_CLIENTS.get(api_key)
+    if client is None:
+        from google import genai
+        client = _GEMINI_CLIENTS[api_key] = genai.Client(api_key=api_key)
+    return client
+
+
+# finish_reason values (as str()) that mean a normal end of stream
+_GEMINI_OK_FINISH = frozenset((
+    "STOP", "MAX_TOKENS", "FinishReason.STOP", "FinishReason.MAX_TOKENS", "0", "1", "None",
+))
+
+
+def run_gemini(message, history, connectors):
+    types = _genai_types()
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        emit({"type": "error", "error": "GEMINI_API_KEY not set. Get one from aistudio.google.com/apikey"})
+        return
+
+    client = _gemini_client(api_key)
+    model = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
+
+    # Smart tool routing — LLM picks relevant tools
+    all_tool_defs, tool_map, system = _provider_setup(message, connectors, api_key)
+    gemini_tools = _gemini_tools(all_tool_defs)
+
+    # Build conversation history once; turns below only append to it
+    contents = [
+        types.Content(
+            role="user" if msg["role"] == "user" else "model",
             parts=[types.Part(text=msg["text"])],
-        ))
+        )
+        for msg in history
+    ]
     contents.append(types.Content(
         role="user",
         parts=[types.Part(text=message)],
@@ -473,9 +1223,12 @@ def run_gemini(message, history, connectors):
             function_calls = []
             had_thinking = False
 
+            # A chunk's text parts go out as one emit at the end of the chunk,
+            # or just before a tool call in it
+            text_buf = []
             chunk_count = 0
             for chunk in client.models.generate_content_stream(
-                model=GEMINI_MODEL,
+                model=model,
                 contents=contents,
                 config=config,
             ):
@@ -486,7 +1239,7 @@ def run_gemini(message, history, connectors):
                 candidate = chunk.candidates[0]
                 finish = getattr(candidate, 'finish_reason', None)
                 # Check for blocked / safety-filtered responses
-                if finish and str(finish) not in ('STOP', 'MAX_TOKENS', 'FinishReason.STOP', 'FinishReason.MAX_TOKENS', '0', '1', 'None'):
+                if finish and str(finish) not in _GEMINI_OK_FINISH:
                     _log(f"Blocked: finish_reason={finish}")
                     emit({"type": "error", "error": f"Response blocked: {finish}"})
                     return
@@ -495,14 +1248,20 @@ def run_gemini(message, history, connectors):
                     _log(f"Chunk {chunk_count}: finish_reason={finish}, no content/parts")
                     continue
                 for part in content.parts:
-                    if hasattr(part, 'thought') and part.thought:
+                    if getattr(part, 'thought', None):
                         had_thinking = True
                         continue
                     if part.text:
                         streamed_text += part.text
-                        emit({"type": "text", "text": part.text})
+                        text_buf.append(part.text)
                     elif part.function_call:
+                        if text_buf:
+                            emit_text("".join(text_buf))
+                            text_buf.clear()
                         function_calls.append(part)
+                if text_buf:
+                    emit_text("".join(text_buf))
+                    text_buf.clear()
 
             _log(f"Stream done: chunks={chunk_count}, text={len(streamed_text)}, calls={len(function_calls)}, thinking={had_thinking}")
 
@@ -520,6 +1279,8 @@ def run_gemini(message, history, connectors):
                 return
 
         except Exception as e:
+            if text_buf:
+                emit_text("".join(text_buf))
             emit({"type": "error", "error": str(e)[:300]})
             return
 
@@ -527,51 +1288,18 @@ def run_gemini(message, history, connectors):
             break
 
         # Execute tool calls
-        function_response_parts = []
-        for part in function_calls:
-            fc = part.function_call
-            tool_name = fc.name
-            args = dict(fc.args) if fc.args else {}
-            conn_name, module, accounts = tool_map.get(tool_name, ("unknown", None, []))
-
-            emit({"type": "tool_call", "tool": tool_name, "connector": conn_name, "args": args})
-
-            if tool_name == "get_briefing":
-                try:
-                    result = _get_briefing(connectors)
-                except Exception as e:
-                    result = f"Briefing error: {e}"
-            elif tool_name == "search_knowledge":
-                try:
-                    import knowledge_base
-                    result = knowledge_base.search(
-                        args.get("query", ""),
-                        connector=args.get("connector"),
-                        max_results=args.get("max_results", 10),
-                    )
-                except Exception as e:
-                    result = f"Knowledge search error: {e}"
-            elif module:
-                try:
-                    result = _call_tool(module, tool_name, args, accounts)
-                except Exception as e:
-                    result = f"Tool error: {e}"
-            else:
-                result = f"Unknown tool: {tool_name}"
-
-            truncated = len(result) > 500 if isinstance(result, str) else False
-            emit({
-                "type": "tool_result", "tool": tool_name, "connector": conn_name,
-                "result": result[:2000] if isinstance(result, str) else str(result)[:2000],
-                "truncated": truncated,
-            })
-
-            function_response_parts.append(
-                types.Part(function_response=types.FunctionResponse(
-                    name=tool_name,
-                    response={"result": result},
-                ))
-            )
+        calls = [
+            (part.function_call.name, {**part.function_call.args} if part.function_call.args else {})
+            for part in function_calls
+        ]
+        results = _run_tool_calls(calls, tool_map, connectors)
+        function_response_parts = [
+            types.Part(function_response=types.FunctionResponse(
+                name=tool_name,
+                response={"result": result},
+            ))
+            for (tool_name, _), result in zip(calls, results)
+        ]
 
         # Build model's response for conversation history
         model_parts = []
@@ -581,14 +1309,283 @@ def run_gemini(message, history, connectors):
         contents.append(types.Content(role="model", parts=model_parts))
         contents.append(types.Content(role="user", parts=function_response_parts))
 
-    emit({"type": "done"})
+
+# ── HTTP sessions ────────────────────────────────────────────────
+
+# One keep-alive session per provider so turns 2..N of the agentic loop
+# reuse the TLS connection instead of re-handshaking on every request.
+_HTTP_SESSIONS = {}
+
+# (connect, read) seconds: an unreachable host fails fast, while a slow first
+# token still gets the full read budget
+_HTTP_TIMEOUT = (5, 60)
+
+
+def _http_session(provider):
+    """Return the pooled requests.Session for a provider (created on first use)."""
+    session = _HTTP_SESSIONS.get(provider)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=2,
+            # Only connect failures and the status codes below are retried: a
+            # read error means the provider may already be generating (and
+            # billing), and re-sending would multiply the read timeout
+            read=0,
+            other=0,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False,  # Let the caller report the final status code
+        )
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retry))
+        # setdefault: the warm-up thread may race the first turn here
+        session = _HTTP_SESSIONS.setdefault(provider, session)
+    return session
+
+
+# ── Streaming (SSE) ──────────────────────────────────────────────
+
+def _iter_sse(resp):
+    """Yield (event, data) pairs from a server-sent-events response body."""
+    event = None
+    for line in resp.iter_lines():
+        if not line:
+            event = None  # Blank line terminates an event
+        elif line.startswith(b"event:"):
+            event = line[6:].strip().decode()
+        elif line.startswith(b"data:"):
+            yield event, line[5:].strip()
+
+
+class _JsonAccumulator:
+    """Collects streamed JSON fragments (tool-call arguments) and parses them once.
+
+    Fragments are appended in O(1) and joined a single time in finalize(),
+    avoiding the quadratic concat/re-parse pattern.
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self):
+        self._parts = []
+
+    def feed(self, fragment):
+        if fragment:
+            self._parts.append(fragment)
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def finalize(self):
+        """Parsed arguments dict, or None when they aren't a complete JSON object.
+
+        Nothing is repaired: arguments cut off mid-stream must never reach a tool.
+        """
+        raw = self.text
+        if not raw.strip():
+            return {}
+        try:
+            args = _json_loads(raw)
+        except ValueError:  # orjson's and json's decode errors both subclass it
+            return None
+        return args if isinstance(args, dict) else None
+
+
+def _stream_openai_turn(resp):
+    """Consume one streamed chat completion, emitting text deltas as they arrive.
+
+    Returns (text, tool_calls, tool_args, finish_reason) where tool_calls is in
+    the same shape as a non-streamed `message.tool_calls` (deltas merged by
+    index) and tool_args holds each call's parsed arguments in order (None when
+    they are not valid JSON).
+    """
+    text_parts = []
+    calls = {}
+    arg_buffers = {}
+    finish_reason = None
+
+    for _, data in _iter_sse(resp):
+        if data == b"[DONE]":
+            break
+        chunk = _json_loads(data)
+        if chunk.get("error"):
+            raise RuntimeError(chunk["error"].get("message", chunk["error"]))
+        if not chunk.get("choices"):
+            continue
+        choice = chunk["choices"][0]
+        finish_reason = choice.get("finish_reason") or finish_reason
+        delta = choice.get("delta") or {}
+
+        if delta.get("content"):
+            text_parts.append(delta["content"])
+            emit_text(delta["content"])
+
+        for tc in delta.get("tool_calls") or []:
+            idx = tc.get("index", 0)
+            call = calls.get(idx)
+            if call is None:
+                call = calls[idx] = {"id": "", "type": "function", "function": {"name": "", "arguments": ""}}
+                arg_buffers[idx] = _JsonAccumulator()
+            if tc.get("id"):
+                call["id"] = tc["id"]
+            fn = tc.get("function") or {}
+            if fn.get("name"):
+                call["function"]["name"] += fn["name"]
+            arg_buffers[idx].feed(fn.get("arguments"))
+
+    order = sorted(calls)
+    for i in order:
+        calls[i]["function"]["arguments"] = arg_buffers[i].text
+    return (
+        "".join(text_parts),
+        [calls[i] for i in order],
+        [arg_buffers[i].finalize() for i in order],
+        finish_reason,
+    )
+
+
+def _stream_openai_response(resp):
+    """Consume one streamed Responses API call, emitting text deltas as they arrive.
+
+    Returns (response_id, function_calls, incomplete, output) where
+    function_calls is a list of (call_id, name, parsed_args or None) in output
+    order, incomplete is the reason the response was cut short (e.g.
+    "max_output_tokens") or None, and output holds the response's text and
+    function calls as input items, raw arguments included, for replaying the
+    turn when the server doesn't store it.
+    """
+    response_id = None
+    incomplete = None
+    calls = {}
+    texts = {}
+
+    for _, data in _iter_sse(resp):
+        if data == b"[DONE]":
+            break
+        payload = _json_loads(data)
+        kind = payload.get("type")
+
+        if kind in ("response.created", "response.completed"):
+            response_id = payload["response"]["id"]
+        elif kind == "response.incomplete":
+            response_id = payload["response"]["id"]
+            incomplete = (payload["response"].get("incomplete_details") or {}).get("reason") or "incomplete"
+        elif kind == "response.output_text.delta":
+            emit_text(payload["delta"])
+            texts.setdefault(payload["output_index"], []).append(payload["delta"])
+        elif kind == "response.output_item.added":
+            item = payload["item"]
+            if item.get("type") == "function_call":
+                args = _JsonAccumulator()
+                args.feed(item.get("arguments"))
+                calls[payload["output_index"]] = (item["call_id"], item["name"], args)
+        elif kind == "response.function_call_arguments.delta":
+            call = calls.get(payload["output_index"])
+            if call:
+                call[2].feed(payload.get("delta"))
+        elif kind == "error":
+            # Stream-level errors carry code/message at the top level
+            raise RuntimeError(payload.get("message") or "unknown error")
+        elif kind == "response.failed":
+            error = (payload.get("response") or {}).get("error") or {}
+            raise RuntimeError(error.get("message") or "unknown error")
+
+    if response_id is None:
+        raise RuntimeError("stream ended without a response id")
+    function_calls = [(call_id, name, args.finalize()) for call_id, name, args in (calls[i] for i in sorted(calls))]
+    output = [
+        {"type": "function_call", "call_id": calls[i][0], "name": calls[i][1], "arguments": calls[i][2].text or "{}"}
+        if i in calls else {"role": "assistant", "content": "".join(texts[i])}
+        for i in sorted(calls.keys() | texts.keys())
+    ]
+    return response_id, function_calls, incomplete, output
+
+
+def _stream_claude_turn(resp):
+    """Consume one streamed Messages response, emitting text deltas as they arrive.
+
+    Returns (content, stop_reason, tool_args) where content is the list of
+    reconstructed text / tool_use blocks, ready to be replayed as the assistant
+    turn, and tool_args maps each tool_use id to its parsed input (None when
+    the streamed input is not valid JSON; the replayed block then carries {}).
+    """
+    blocks = {}
+    input_buffers = {}
+    tool_args = {}
+    stop_reason = None
+
+    for event, data in _iter_sse(resp):
+        payload = _json_loads(data)
+        kind = payload.get("type", event)
+
+        if kind == "content_block_start":
+            block = dict(payload["content_block"])
+            blocks[payload["index"]] = block
+            if block["type"] == "tool_use":
+                input_buffers[payload["index"]] = _JsonAccumulator()
+        elif kind == "content_block_delta":
+            idx = payload["index"]
+            delta = payload["delta"]
+            if delta["type"] == "text_delta":
+                blocks[idx]["text"] = blocks[idx].get("text", "") + delta["text"]
+                emit_text(delta["text"])
+            elif delta["type"] == "input_json_delta":
+                input_buffers[idx].feed(delta.get("partial_json"))
+        elif kind == "content_block_stop":
+            idx = payload["index"]
+            if idx in input_buffers:
+                args = input_buffers.pop(idx).finalize()
+                tool_args[blocks[idx]["id"]] = args
+                blocks[idx]["input"] = args if args is not None else {}
+        elif kind == "message_delta":
+            stop_reason = payload.get("delta", {}).get("stop_reason", stop_reason)
+        elif kind == "error":
+            raise RuntimeError(payload.get("error", {}).get("message", "unknown error"))
+
+    # Empty text blocks are rejected when replayed, so drop them here
+    content = [
+        blocks[i] for i in sorted(blocks)
+        if blocks[i]["type"] == "tool_use" or (blocks[i]["type"] == "text" and blocks[i].get("text"))
+    ]
+    # A tool_use block that never reached content_block_stop was cut off
+    for idx in input_buffers:
+        tool_args[blocks[idx]["id"]] = None
+        blocks[idx]["input"] = {}
+    return content, stop_reason, tool_args
 
 
 # ── Provider: OpenAI ─────────────────────────────────────────────
 
-def run_openai(message, history, connectors):
-    import requests
+# Models that rejected the Responses API in this process; they go straight to
+# chat completions instead of probing again
+_OPENAI_RESPONSES_UNSUPPORTED = set()
+# Error codes meaning "this model can't be used here", as opposed to a bad request
+_RESPONSES_UNSUPPORTED_CODES = frozenset(("unsupported_model", "model_not_supported"))
 
+
+def _responses_unsupported(resp):
+    """True when a Responses API error means the model or endpoint can't serve it.
+
+    Context-length errors, bad tool schemas and other invalid input are not
+    fallback cases — chat completions would reject them too.
+    """
+    try:
+        error = resp.json().get("error") or {}
+    except Exception:
+        error = {}
+    if resp.status_code == 404:
+        # No such endpoint (e.g. an OpenAI-compatible proxy); an unknown model fails everywhere
+        return error.get("code") != "model_not_found"
+    return resp.status_code == 400 and error.get("code") in _RESPONSES_UNSUPPORTED_CODES
+
+
+def run_openai(message, history, connectors):
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         emit({"type": "error", "error": "OPENAI_API_KEY not set"})
@@ -597,112 +1594,152 @@ def run_openai(message, history, connectors):
     emit({"type": "thinking", "text": "Connecting to OpenAI..."})
 
     # Smart tool routing — uses Gemini API key for routing even with OpenAI provider
-    import tool_router
-    gemini_key = os.environ.get("GEMINI_API_KEY")
-    allowed_tools = tool_router.route(message, connectors, gemini_key)
-    if allowed_tools:
-        emit({"type": "thinking", "text": f"Routed to {len(allowed_tools)} tools"})
-
-    # Build tool definitions + briefing + knowledge
-    all_tool_defs, tool_map = build_tools_and_map(connectors, allowed_tools=allowed_tools)
-    all_tool_defs.append(BRIEFING_TOOL_DEF)
-    tool_map["get_briefing"] = ("_briefing", None, [])
-
-    import knowledge_base
-    all_tool_defs.append(knowledge_base.KNOWLEDGE_TOOL_DEF)
-    tool_map["search_knowledge"] = ("_knowledge", None, [])
-
-    tool_defs = []
-    for tool in all_tool_defs:
-        tool_defs.append({
-            "type": "function",
-            "function": {
-                "name": tool["name"],
-                "description": tool["description"],
-                "parameters": tool.get("parameters", {"type": "object", "properties": {}}),
-            },
-        })
-
-    messages = [{"role": "system", "content": build_system_prompt(connectors)}]
-    for msg in history:
-        messages.append({"role": msg["role"], "content": msg["text"]})
-    messages.append({"role": "user", "content": message})
+    all_tool_defs, tool_map, system = _provider_setup(message, connectors, os.environ.get("GEMINI_API_KEY"))
 
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    model = os.environ.get("OPENAI_MODEL", "gpt-4o")
+    args = (model, headers, system, message, history, all_tool_defs, tool_map, connectors)
+
+    ok = None
+    if model not in _OPENAI_RESPONSES_UNSUPPORTED:
+        ok = _openai_responses_loop(*args)
+    if ok is None:
+        _openai_chat_loop(*args)
+
+
+def _openai_responses_loop(model, headers, system, message, history, all_tool_defs, tool_map, connectors):
+    """Agentic loop on the Responses API.
+
+    Turn 1 sends the conversation; later turns send only the new tool outputs
+    plus previous_response_id, so request size no longer grows every turn.
+    That needs OpenAI to store each response, so it is opt-in with
+    CLAWFOUNDER_OPENAI_STORE=1; by default requests send store=false (nothing
+    kept server-side, like chat completions) and replay the whole exchange.
+    Returns True when finished, False after emitting an error, or None when
+    the API rejected the model up front (the caller falls back to chat completions).
+    """
+    tools = _build_openai_responses_tools(all_tool_defs)
+    store = os.environ.get("CLAWFOUNDER_OPENAI_STORE", "").strip().lower() in ("1", "true", "yes")
+
+    body = {"model": model, "instructions": system, "stream": True}
+    body["input"] = [{"role": msg["role"], "content": msg["text"]} for msg in history]
+    body["input"].append({"role": "user", "content": message})
+    if tools:
+        body["tools"] = tools
+    body["store"] = store
 
     max_turns = 20
     for turn in range(max_turns):
-        model = os.environ.get("OPENAI_MODEL", "gpt-4o")
-        body = {"model": model, "messages": messages}
-        if tool_defs:
-            body["tools"] = tool_defs
-
         try:
-            resp = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=body, timeout=60)
+            resp = _http_session("openai").post(
+                "https://api.openai.com/v1/responses",
+                headers=headers, data=_json_body(body), timeout=_HTTP_TIMEOUT, stream=True,
+            )
         except Exception as e:
             emit({"type": "error", "error": f"Network error: {e}"})
-            return
+            return False
+
+        with resp:
+            if resp.status_code != 200:
+                if turn == 0 and _responses_unsupported(resp):
+                    _log(f"Responses API rejected {model} ({resp.status_code}): {resp.text[:200]}")
+                    _log("Using chat completions")
+                    _OPENAI_RESPONSES_UNSUPPORTED.add(model)
+                    return None
+                emit({"type": "error", "error": f"OpenAI error ({resp.status_code}): {resp.text[:200]}"})
+                return False
+
+            try:
+                response_id, function_calls, incomplete, output = _stream_openai_response(resp)
+            except Exception as e:
+                emit({"type": "error", "error": f"Stream error: {e}"})
+                return False
 
-        if resp.status_code != 200:
-            emit({"type": "error", "error": f"OpenAI error ({resp.status_code}): {resp.text[:200]}"})
-            return
+        if not function_calls:
+            break
+        if incomplete:
+            emit({"type": "error", "error": _TRUNCATED_TOOL_CALL_ERROR})
+            return False
+
+        results = _run_tool_calls([(name, args) for _, name, args in function_calls], tool_map, connectors)
+
+        outputs = [
+            {
+                "type": "function_call_output",
+                "call_id": call_id,
+                "output": _result_text(result),
+            }
+            for (call_id, _, _), result in zip(function_calls, results)
+        ]
+        if store:
+            # The server keeps the conversation; send only what is new
+            body["previous_response_id"] = response_id
+            body["input"] = outputs
+        else:
+            # Replay the turn as streamed: its text and the calls' raw arguments
+            body["input"].extend(output)
+            body["input"].extend(outputs)
 
-        data = resp.json()
-        choice = data["choices"][0]
-        msg = choice["message"]
+    return True
 
-        if msg.get("tool_calls"):
-            messages.append(msg)
 
-            for tc in msg["tool_calls"]:
-                tool_name = tc["function"]["name"]
-                args = json.loads(tc["function"]["arguments"]) if tc["function"].get("arguments") else {}
-                conn_name, module, accounts = tool_map.get(tool_name, ("unknown", None, []))
+def _openai_chat_loop(model, headers, system, message, history, all_tool_defs, tool_map, connectors):
+    """Agentic loop on chat completions. Returns False after emitting an error."""
+    tool_defs = _build_openai_tools(all_tool_defs)
 
-                emit({"type": "tool_call", "tool": tool_name, "connector": conn_name, "args": args})
+    messages = [{"role": "system", "content": system}]
+    messages.extend({"role": msg["role"], "content": msg["text"]} for msg in history)
+    messages.append({"role": "user", "content": message})
 
-                if tool_name == "get_briefing":
-                    try:
-                        result = _get_briefing(connectors)
-                    except Exception as e:
-                        result = f"Briefing error: {e}"
-                elif tool_name == "search_knowledge":
-                    try:
-                        result = knowledge_base.search(
-                            args.get("query", ""),
-                            connector=args.get("connector"),
-                            max_results=args.get("max_results", 10),
-                        )
-                    except Exception as e:
-                        result = f"Knowledge search error: {e}"
-                elif module:
-                    try:
-                        result = _call_tool(module, tool_name, args, accounts)
-                    except Exception as e:
-                        result = f"Tool error: {e}"
-                else:
-                    result = f"Unknown tool: {tool_name}"
-
-                emit({
-                    "type": "tool_result", "tool": tool_name, "connector": conn_name,
-                    "result": result[:2000] if isinstance(result, str) else str(result)[:2000],
-                    "truncated": len(result) > 500 if isinstance(result, str) else False,
-                })
-
-                messages.append({"role": "tool", "tool_call_id": tc["id"], "content": result})
+    # Only `messages` grows between turns; the rest of the body is fixed
+    body = {"model": model, "messages": messages, "stream": True}
+    if tool_defs:
+        body["tools"] = tool_defs
+
+    max_turns = 20
+    for turn in range(max_turns):
+        try:
+            resp = _http_session("openai").post(
+                "https://api.openai.com/v1/chat/completions",
+                headers=headers, data=_json_body(body), timeout=_HTTP_TIMEOUT, stream=True,
+            )
+        except Exception as e:
+            emit({"type": "error", "error": f"Network error: {e}"})
+            return False
+
+        with resp:
+            if resp.status_code != 200:
+                emit({"type": "error", "error": f"OpenAI error ({resp.status_code}): {resp.text[:200]}"})
+                return False
+
+            try:
+                text, tool_calls, tool_args, finish_reason = _stream_openai_turn(resp)
+            except Exception as e:
+                emit({"type": "error", "error": f"Stream error: {e}"})
+                return False
+
+        if tool_calls and finish_reason == "length":
+            emit({"type": "error", "error": _TRUNCATED_TOOL_CALL_ERROR})
+            return False
+
+        if tool_calls:
+            messages.append({"role": "assistant", "content": text or None, "tool_calls": tool_calls})
+
+            calls = [(tc["function"]["name"], args) for tc, args in zip(tool_calls, tool_args)]
+            results = _run_tool_calls(calls, tool_map, connectors)
+            messages.extend(
+                {"role": "tool", "tool_call_id": tc["id"], "content": _result_text(result)}
+                for tc, result in zip(tool_calls, results)
+            )
         else:
-            if msg.get("content"):
-                emit({"type": "text", "text": msg["content"]})
             break
 
-    emit({"type": "done"})
+    return True
 
 
 # ── Provider: Claude ─────────────────────────────────────────────
 
 def run_claude(message, history, connectors):
-    import requests
-
     api_key = os.environ.get("ANTHROPIC_API_KEY")
     if not api_key:
         emit({"type": "error", "error": "ANTHROPIC_API_KEY not set"})
@@ -711,32 +1748,10 @@ def run_claude(message, history, connectors):
     emit({"type": "thinking", "text": "Connecting to Claude..."})
 
     # Smart tool routing
-    import tool_router
-    gemini_key = os.environ.get("GEMINI_API_KEY")
-    allowed_tools = tool_router.route(message, connectors, gemini_key)
-    if allowed_tools:
-        emit({"type": "thinking", "text": f"Routed to {len(allowed_tools)} tools"})
-
-    # Build tool definitions + briefing + knowledge
-    all_tool_defs, tool_map = build_tools_and_map(connectors, allowed_tools=allowed_tools)
-    all_tool_defs.append(BRIEFING_TOOL_DEF)
-    tool_map["get_briefing"] = ("_briefing", None, [])
-
-    import knowledge_base
-    all_tool_defs.append(knowledge_base.KNOWLEDGE_TOOL_DEF)
-    tool_map["search_knowledge"] = ("_knowledge", None, [])
-
-    tool_defs = []
-    for tool in all_tool_defs:
-        tool_defs.append({
-            "name": tool["name"],
-            "description": tool["description"],
-            "input_schema": tool.get("parameters", {"type": "object", "properties": {}}),
-        })
+    all_tool_defs, tool_map, system = _provider_setup(message, connectors, os.environ.get("GEMINI_API_KEY"))
+    tool_defs = _build_claude_tools(all_tool_defs)
 
-    messages = []
-    for msg in history:
-        messages.append({"role": msg["role"], "content": msg["text"]})
+    messages = [{"role": msg["role"], "content": msg["text"]} for msg in history]
     messages.append({"role": "user", "content": message})
 
     headers = {
@@ -745,92 +1760,171 @@ def run_claude(message, history, connectors):
         "Content-Type": "application/json",
     }
 
+    # Only `messages` grows between turns; the rest of the body is fixed
+    body = {
+        "model": os.environ.get("ANTHROPIC_MODEL", "claude-sonnet-4-6"),
+        "max_tokens": 4096,
+        "system": system,
+        "messages": messages,
+        "stream": True,
+    }
+    if tool_defs:
+        body["tools"] = tool_defs
+
     max_turns = 20
     for turn in range(max_turns):
-        body = {
-            "model": os.environ.get("ANTHROPIC_MODEL", "claude-sonnet-4-6"),
-            "max_tokens": 4096,
-            "system": build_system_prompt(connectors),
-            "messages": messages,
-        }
-        if tool_defs:
-            body["tools"] = tool_defs
-
         try:
-            resp = requests.post("https://api.anthropic.com/v1/messages", headers=headers, json=body, timeout=60)
+            resp = _http_session("claude").post(
+                "https://api.anthropic.com/v1/messages",
+                headers=headers, data=_json_body(body), timeout=_HTTP_TIMEOUT, stream=True,
+            )
         except Exception as e:
             emit({"type": "error", "error": f"Network error: {e}"})
             return
 
-        if resp.status_code != 200:
-            emit({"type": "error", "error": f"Claude error ({resp.status_code}): {resp.text[:200]}"})
+        with resp:
+            if resp.status_code != 200:
+                emit({"type": "error", "error": f"Claude error ({resp.status_code}): {resp.text[:200]}"})
+                return
+
+            try:
+                content, stop_reason, tool_args = _stream_claude_turn(resp)
+            except Exception as e:
+                emit({"type": "error", "error": f"Stream error: {e}"})
+                return
+
+        tool_uses = [block for block in content if block["type"] == "tool_use"]
+        has_tool_use = bool(tool_uses)
+        if has_tool_use and stop_reason == "max_tokens":
+            emit({"type": "error", "error": _TRUNCATED_TOOL_CALL_ERROR})
             return
+        if has_tool_use:
+            calls = [(block["name"], tool_args.get(block["id"], block.get("input", {}))) for block in tool_uses]
+            results = _run_tool_calls(calls, tool_map, connectors)
+            tool_results = [
+                {
+                    "type": "tool_result", "tool_use_id": block["id"], "content": _result_text(result),
+                    **({"is_error": True} if tool_args.get(block["id"], {}) is None else {}),
+                }
+                for block, result in zip(tool_uses, results)
+            ]
 
-        data = resp.json()
-        has_tool_use = False
-        tool_results = []
+        if not has_tool_use or stop_reason != "tool_use":
+            break
 
-        for block in data.get("content", []):
-            if block["type"] == "text":
-                if not has_tool_use:
-                    emit({"type": "text", "text": block["text"]})
+        messages.append({"role": "assistant", "content": content})
+        messages.append({"role": "user", "content": tool_results})
 
-            elif block["type"] == "tool_use":
-                has_tool_use = True
-                tool_name = block["name"]
-                args = block.get("input", {})
-                conn_name, module, accounts = tool_map.get(tool_name, ("unknown", None, []))
 
-                emit({"type": "tool_call", "tool": tool_name, "connector": conn_name, "args": args})
+# ── Main ─────────────────────────────────────────────────────────
 
-                if tool_name == "get_briefing":
-                    try:
-                        result = _get_briefing(connectors)
-                    except Exception as e:
-                        result = f"Briefing error: {e}"
-                elif tool_name == "search_knowledge":
-                    try:
-                        result = knowledge_base.search(
-                            args.get("query", ""),
-                            connector=args.get("connector"),
-                            max_results=args.get("max_results", 10),
-                        )
-                    except Exception as e:
-                        result = f"Knowledge search error: {e}"
-                elif module:
-                    try:
-                        result = _call_tool(module, tool_name, args, accounts)
-                    except Exception as e:
-                        result = f"Tool error: {e}"
-                else:
-                    result = f"Unknown tool: {tool_name}"
-
-                emit({
-                    "type": "tool_result", "tool": tool_name, "connector": conn_name,
-                    "result": result[:2000] if isinstance(result, str) else str(result)[:2000],
-                    "truncated": len(result) > 500 if isinstance(result, str) else False,
-                })
-
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": block["id"],
-                    "content": result,
-                })
-
-        if not has_tool_use or data.get("stop_reason") != "tool_use":
-            break
+_PROVIDERS = {
+    "gemini": run_gemini,
+    "openai": run_openai,
+    "claude": run_claude,
+}
 
-        messages.append({"role": "assistant", "content": data["content"]})
-        messages.append({"role": "user", "content": tool_results})
+# Concurrent conversations per provider within one agent process. A run has at
+# most one provider request in flight, so in the chat daemon, which serves every
+# chat, this caps in-flight requests per provider. A one-shot process runs a
+# single chat, so there the limit never applies.
+_PROVIDER_SLOTS = {
+    name: threading.BoundedSemaphore(_env_int(f"CLAWFOUNDER_{name.upper()}_MAX_CONCURRENCY", 10))
+    for name in _PROVIDERS
+}
 
-    emit({"type": "done"})
+# Heavy imports each provider's run will need (google.genai alone is ~400ms).
+# Warming them on a background thread overlaps that cost with loading
+# connectors; the in-function imports then hit sys.modules. google.genai is
+# needed by every provider because the tool router calls Gemini; requests
+# only by the HTTP-based providers.
+_COMMON_WARM_IMPORTS = ("google.genai", "tool_router", "knowledge_base")
+_WARM_IMPORTS = {
+    "gemini": _COMMON_WARM_IMPORTS,
+    "openai": ("requests", *_COMMON_WARM_IMPORTS),
+    "claude": ("requests", *_COMMON_WARM_IMPORTS),
+}
 
 
-# ── Main ─────────────────────────────────────────────────────────
+# Hosts whose TLS connection is opened ahead of the first turn; Gemini goes
+# through the SDK's own HTTP client, which can't be pre-connected from here
+_WARM_HOSTS = {
+    "openai": "https://api.openai.com/v1/",
+    "claude": "https://api.anthropic.com/v1/",
+}
 
-def main():
+
+def _warm_imports(provider):
+    for name in _WARM_IMPORTS.get(provider, ()):
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass  # The real import site reports missing deps
+
+    # Handshake now, while connectors load, so the first turn reuses a pooled connection
+    url = _WARM_HOSTS.get(provider)
+    if url:
+        try:
+            _http_session(provider).head(url, timeout=_HTTP_TIMEOUT[0])
+        except Exception:
+            pass  # The real request reports network errors
+
+
+# Socket chat_agent_server.py listens on; its presence means a daemon may be up
+DAEMON_SOCKET = Path.home() / ".clawfounder" / "agent.sock"
+
+
+def _forward_to_daemon(raw):
+    """Stream a request through the chat daemon. False if none is reachable.
+
+    Sends this process's environment (server.js merges .env into it) as a
+    header line, then the raw request, and copies the JSONL reply to stdout.
+    """
+    if os.environ.get("CLAWFOUNDER_NO_DAEMON") or not DAEMON_SOCKET.exists():
+        return False
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
     try:
-        input_data = json.loads(sys.stdin.read())
+        sock.connect(str(DAEMON_SOCKET))
+    except OSError:
+        sock.close()
+        return False  # Stale socket — the daemon isn't running
+    replied = False
+    with sock:
+        try:
+            sock.sendall(_json_body({"env": dict(os.environ)}) + b"\n" + raw)
+            sock.shutdown(socket.SHUT_WR)
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                replied = True
+                _stdout.write(chunk, urgent=True)
+        except OSError as e:
+            _log(f"Daemon connection failed: {e}")
+    # Run in-process only if the daemon died before sending anything
+    return replied
+
+
+def run_request(raw, out=None):
+    """Handle one chat request (the stdin payload, as bytes).
+
+    Events go to `out` (a _JsonlWriter) when given, else to stdout.
+    """
+    drop_token = _EMIT_DROP.set(_drop_events())
+    token = _OUTPUT.set(out) if out is not None else None
+    try:
+        _run_request(raw)
+    finally:
+        if token is not None:
+            _OUTPUT.reset(token)
+        _EMIT_DROP.reset(drop_token)
+
+
+def _run_request(raw):
+    try:
+        input_data = _json_loads(raw)
     except Exception as e:
         emit({"type": "error", "error": f"Invalid input: {e}"})
         emit({"type": "done"})
@@ -839,6 +1933,7 @@ def main():
     message = input_data.get("message", "")
     provider = input_data.get("provider", "gemini")
     chat_history = input_data.get("history", [])
+    threading.Thread(target=_warm_imports, args=(provider,), name="warm-imports", daemon=True).start()
 
     if not message.strip():
         emit({"type": "error", "error": "Empty message"})
@@ -851,23 +1946,30 @@ def main():
     emit({"type": "thinking", "text": f"Loaded {len(conn_names)} connector(s): {', '.join(conn_names)}"})
 
     # Route to provider
-    providers = {
-        "gemini": run_gemini,
-        "openai": run_openai,
-        "claude": run_claude,
-    }
-
-    run_fn = providers.get(provider)
+    run_fn = _PROVIDERS.get(provider)
     if not run_fn:
         emit({"type": "error", "error": f"Unknown provider: {provider}"})
         emit({"type": "done"})
         return
 
+    slots = _PROVIDER_SLOTS[provider]
+    if not slots.acquire(blocking=False):
+        emit({"type": "thinking", "text": f"Waiting for a free {provider} slot..."})
+        slots.acquire()
     try:
         run_fn(message, chat_history, connectors)
     except Exception as e:
         emit({"type": "error", "error": f"Agent error: {e}"})
-        emit({"type": "done"})
+    finally:
+        slots.release()
+    # Providers just return, after an error too; server.js ends the chat on "done"
+    emit({"type": "done"})
+
+
+def main():
+    raw = sys.stdin.buffer.read()
+    if not _forward_to_daemon(raw):
+        run_request(raw)
 
 
 if __name__ == "__main__":
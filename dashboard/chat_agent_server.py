@@ -0,0 +1,191 @@
+"""
+ClawFounder — Chat Agent Daemon
+
+Long-lived process that serves chat requests over a Unix socket, so Python
+startup, SDK imports, connector modules, HTTP sessions and chat_agent's caches
+are paid once instead of on every chat. chat_agent.py forwards its request
+here whenever ~/.clawfounder/agent.sock accepts connections, and runs
+in-process otherwise.
+
+Protocol (one request per connection):
+  client → {"env": {...}}\\n, then the chat_agent stdin payload, then EOF
+  server → the JSONL events chat_agent would have written to stdout
+
+The daemon adopts each client's environment, so .env edits (keys, models,
+removed credentials) apply from the next chat. Connectors read os.environ, so
+chats only run side by side while their environments match; a request with a
+different one waits for the running chats to finish first.
+
+Pool sizes are fixed when the daemon starts: CLAWFOUNDER_*_MAX_CONCURRENCY
+and CLAWFOUNDER_TOOL_WORKERS need a restart. The per-provider
+MAX_CONCURRENCY limit only exists here; one-shot chats each run alone.
+
+Usage:
+  python dashboard/chat_agent_server.py
+"""
+
+import os
+import sys
+import signal
+import socket
+import socketserver
+import importlib
+import threading
+from collections import deque
+
+import chat_agent
+
+SOCKET_PATH = chat_agent.DAEMON_SOCKET
+
+
+def _log(msg):
+    print(f"[chat-daemon] {msg}", file=sys.stderr, flush=True)
+
+
+def _apply_env(env):
+    """Make os.environ match the client's (API keys, model overrides, connector creds).
+
+    Keys the client no longer sends are removed and only changed keys are
+    written; any change drops chat_agent's env-dependent caches. Callers hold
+    _EnvGate, so no chat is running under a different env.
+    """
+    stale = [k for k in os.environ if k not in env]
+    for key in stale:
+        del os.environ[key]
+    for key, value in env.items():
+        if os.environ.get(key) != value:
+            os.environ[key] = value
+            stale.append(key)
+    if stale:
+        chat_agent._forget_env_caches()
+
+
+class _EnvGate:
+    """Admits requests in arrival order, concurrently only while they share one env.
+
+    Connectors read their credentials from os.environ, so it can't differ per
+    thread. A request whose env differs from the one in effect waits until
+    the running chats finish, then swaps os.environ before it starts.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._env = None
+        self._active = 0
+
+    def enter(self, env, on_wait=None):
+        """Block until `env` may run; on_wait() is called once if it waits for an env change."""
+        with self._cond:
+            if not env:
+                env = self._env  # Malformed header — keep the environment in effect
+            ticket = object()
+            self._queue.append(ticket)
+            try:
+                while self._queue[0] is not ticket or (self._active and env != self._env):
+                    if on_wait and env != self._env:
+                        on_wait()
+                        on_wait = None
+                    self._cond.wait()
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()  # The next in line may share this env
+            if env is not None and env != self._env:
+                _apply_env(env)
+                self._env = env
+            self._active += 1
+
+    def leave(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+
+_ENV_GATE = _EnvGate()
+_WAITING_EVENT = {"type": "thinking", "text": "Waiting for other chats to finish (environment changed)..."}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            header = chat_agent._json_loads(self.rfile.readline() or b"{}")
+        except Exception:
+            header = {}
+        raw = self.rfile.read()
+
+        out = chat_agent._JsonlWriter(self.wfile)
+
+        def waiting():
+            try:
+                out.write(chat_agent._dumps_line(_WAITING_EVENT), urgent=True)
+            except OSError:
+                pass  # Client went away; it still runs once admitted, like any chat
+
+        _ENV_GATE.enter(header.get("env") or {}, on_wait=waiting)
+        try:
+            chat_agent.run_request(raw, out)
+        except OSError:
+            pass  # Client went away (dashboard disconnected)
+        finally:
+            _ENV_GATE.leave()
+            try:
+                out.close()
+            except OSError:
+                pass
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def _warm():
+    """Import every provider's SDKs and load connectors before the first request."""
+    for name in ("requests", *chat_agent._COMMON_WARM_IMPORTS):
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+    chat_agent.load_all_connectors()
+
+
+def _claim_socket():
+    """Remove a stale socket file; exit if another daemon is already serving."""
+    if not SOCKET_PATH.exists():
+        SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(SOCKET_PATH))
+    except OSError:
+        SOCKET_PATH.unlink(missing_ok=True)
+    else:
+        _log(f"Another daemon is already listening on {SOCKET_PATH}")
+        sys.exit(1)
+    finally:
+        probe.close()
+
+
+def main():
+    _claim_socket()
+    _warm()
+
+    old_umask = os.umask(0o077)  # The socket runs chats with the user's API keys
+    try:
+        server = _Server(str(SOCKET_PATH), _Handler)
+    finally:
+        os.umask(old_umask)
+
+    # SIGTERM unwinds like Ctrl-C so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    _log(f"Listening on {SOCKET_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        SOCKET_PATH.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
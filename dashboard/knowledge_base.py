@@ -11,12 +11,16 @@ import json
 import re
 import sqlite3
 import hashlib
+import threading
 from datetime import datetime
 from pathlib import Path
 from email.utils import parsedate_to_datetime
 
 _DB_PATH = Path.home() / ".clawfounder" / "knowledge.db"
 _db_conn = None
+# The chat agent runs tool calls on worker threads, so the shared connection
+# is opened with check_same_thread=False and every use goes through this lock.
+_db_lock = threading.RLock()
 
 # ── Schema ────────────────────────────────────────────────────────
 
@@ -74,7 +78,7 @@ def _get_db():
         return _db_conn
 
     _DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(_DB_PATH), timeout=5)
+    conn = sqlite3.connect(str(_DB_PATH), timeout=5, check_same_thread=False)
     conn.execute("PRAGMA foreign_keys = ON")
     conn.executescript(_SCHEMA)
     try:
@@ -443,7 +447,8 @@ _EXTRACTORS = {
 def index(connector, tool_name, result, args=None, account_id=None):
     """Index a tool call result into the knowledge base. Never raises."""
     try:
-        _index_impl(connector, tool_name, result, args, account_id)
+        with _db_lock:
+            _index_impl(connector, tool_name, result, args, account_id)
     except Exception:
         pass
 
@@ -576,6 +581,12 @@ KNOWLEDGE_TOOL_DEF = {
 
 def search(query, connector=None, max_results=10):
     """Search the knowledge base. Returns JSON string for the LLM."""
+    with _db_lock:
+        return _search_impl(query, connector, max_results)
+
+
+def _search_impl(query, connector, max_results):
+    """Actual search implementation."""
     db = _get_db()
     results = []
     seen_ids = set()
@@ -671,12 +682,13 @@ def _fts5_escape(query):
 
 def clear():
     """Clear all knowledge data."""
-    db = _get_db()
-    db.execute("DELETE FROM item_entities")
-    db.execute("DELETE FROM entities")
-    db.execute("DELETE FROM knowledge_items")
-    try:
-        db.execute("INSERT INTO knowledge_fts(knowledge_fts) VALUES('rebuild')")
-    except Exception:
-        pass
-    db.commit()
+    with _db_lock:
+        db = _get_db()
+        db.execute("DELETE FROM item_entities")
+        db.execute("DELETE FROM entities")
+        db.execute("DELETE FROM knowledge_items")
+        try:
+            db.execute("INSERT INTO knowledge_fts(knowledge_fts) VALUES('rebuild')")
+        except Exception:
+            pass
+        db.commit()
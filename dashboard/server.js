@@ -1195,7 +1195,8 @@ app.post('/api/chat', (req, res) => {
     res.flushHeaders();
 
     // Merge the .env vars into the child process environment
-    const envVars = { ...process.env, ...readEnv() };
+    // (CLAWFOUNDER_ENV_MERGED tells chat_agent.py it can skip re-reading .env)
+    const envVars = { ...process.env, ...readEnv(), CLAWFOUNDER_ENV_MERGED: '1' };
 
     const pyScript = path.join(__dirname, 'chat_agent.py');
     // Use venv Python if available — check uv's .venv first, then venv
@@ -1211,9 +1212,14 @@ app.post('/api/chat', (req, res) => {
     });
 
     let processExited = false;
+    // Set once the agent emits `done`; the process may keep running briefly
+    // afterwards (e.g. finishing knowledge-base indexing) but the chat is over
+    let chatEnded = false;
 
     proc.on('error', (err) => {
         console.error('[chat] Spawn error:', err);
+        if (chatEnded) return;
+        chatEnded = true;
         res.write(`data: ${JSON.stringify({ type: 'error', error: `Spawn error: ${err.message}` })}\n\n`);
         res.end();
     });
@@ -1227,12 +1233,22 @@ app.post('/api/chat', (req, res) => {
     proc.stdout.on('data', (data) => {
         const chunk = data.toString();
         console.log('[chat] stdout:', chunk.trim());
+        if (chatEnded) return;
         buffer += chunk;
         const lines = buffer.split('\n');
         buffer = lines.pop();
         for (const line of lines) {
-            if (line.trim()) {
-                res.write(`data: ${line}\n\n`);
+            if (!line.trim()) continue;
+            res.write(`data: ${line}\n\n`);
+            // Cheap substring check first; only candidate lines are parsed
+            let event = null;
+            if (line.includes('"done"')) {
+                try { event = JSON.parse(line); } catch { /* non-JSON line */ }
+            }
+            if (event && event.type === 'done') {
+                chatEnded = true;
+                res.end();
+                return;
             }
         }
     });
@@ -1244,6 +1260,8 @@ app.post('/api/chat', (req, res) => {
     proc.on('close', (code) => {
         processExited = true;
         console.log(`[chat] Process exited with code ${code}`);
+        if (chatEnded) return;
+        chatEnded = true;
         if (buffer.trim()) {
             res.write(`data: ${buffer}\n\n`);
         }
@@ -1251,9 +1269,10 @@ app.post('/api/chat', (req, res) => {
         res.end();
     });
 
-    // Only kill process if client truly disconnects while process is still running
+    // Only kill process if client truly disconnects mid-chat — after `done`
+    // it is just finishing background work and must be left to exit on its own
     res.on('close', () => {
-        if (!processExited) {
+        if (!processExited && !chatEnded) {
             console.log('[chat] Client disconnected, killing process');
             proc.kill();
         }
@@ -198,7 +198,6 @@ export default function ChatView({ prefillMessage, onPrefillConsumed }) {
             const reader = response.body.getReader()
             const decoder = new TextDecoder()
             let buffer = ''
-            let currentToolCall = null
 
             while (true) {
                 const { value, done } = await reader.read()
@@ -219,7 +218,6 @@ export default function ChatView({ prefillMessage, onPrefillConsumed }) {
                         if (event.type === 'done') continue
 
                         if (event.type === 'tool_call') {
-                            currentToolCall = event
                             // Add a pending tool event
                             setMessages(prev => {
                                 const msgs = [...prev]
@@ -232,20 +230,19 @@ export default function ChatView({ prefillMessage, onPrefillConsumed }) {
                         }
 
                         if (event.type === 'tool_result') {
-                            // Merge with the previous tool_call or add standalone
-                            const merged = { ...event, ...(currentToolCall || {}), type: 'tool_result' }
-                            currentToolCall = null
-
                             setMessages(prev => {
                                 const msgs = [...prev]
                                 const last = { ...msgs[msgs.length - 1] }
-                                // Replace the last tool_call event with the merged result
+                                // A turn's tool calls run concurrently, so results can arrive
+                                // out of order — merge into the oldest pending call for this tool
                                 const evts = [...last.events]
-                                const callIdx = evts.findLastIndex(e => e.type === 'tool_call' && e.tool === merged.tool)
+                                const callIdx = evts.findIndex(e => e.type === 'tool_call' && (
+                                    event.call_id != null ? e.call_id === event.call_id : e.tool === event.tool
+                                ))
                                 if (callIdx >= 0) {
-                                    evts[callIdx] = merged
+                                    evts[callIdx] = { ...event, ...evts[callIdx], type: 'tool_result' }
                                 } else {
-                                    evts.push(merged)
+                                    evts.push(event)
                                 }
                                 last.events = evts
                                 msgs[msgs.length - 1] = last
@@ -0,0 +1,558 @@
+"""Chat agent tests.
+
+Covers the provider SSE parsers, HTTP sessions and retries, tool dispatch,
+caches, lazy connector loading, briefings, the JSONL event writer and
+background indexing.
+"""
+
+import io
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+import chat_agent
+from chat_agent import (
+    _JsonAccumulator,
+    _dispatch_tool,
+    _stream_claude_turn,
+    _stream_openai_response,
+    _stream_openai_turn,
+    emit_text,
+)
+
+
+class FakeResp:
+    """Stands in for a streamed requests.Response."""
+
+    def __init__(self, events, done=True):
+        self._lines = []
+        for event in events:
+            self._lines.append(b"data: " + json.dumps(event).encode())
+            self._lines.append(b"")
+        if done:
+            self._lines.append(b"data: [DONE]")
+
+    def iter_lines(self, *args, **kwargs):
+        return iter(self._lines)
+
+
+@pytest.fixture(autouse=True)
+def quiet_emit(monkeypatch):
+    events = []
+    monkeypatch.setattr(chat_agent, "emit", events.append)
+    monkeypatch.setattr(chat_agent, "emit_text", lambda text: events.append({"type": "text", "text": text}))
+    return events
+
+
+class TestJsonAccumulator:
+    def test_empty_is_no_args(self):
+        assert _JsonAccumulator().finalize() == {}
+
+    def test_joins_fragments(self):
+        acc = _JsonAccumulator()
+        for part in ('{"q": "hel', 'lo", "n"', ": 3}"):
+            acc.feed(part)
+        assert acc.finalize() == {"q": "hello", "n": 3}
+
+    def test_truncated_json_is_rejected(self):
+        acc = _JsonAccumulator()
+        acc.feed('{"q": "hel')
+        assert acc.finalize() is None
+
+    def test_dangling_key_is_rejected(self):
+        acc = _JsonAccumulator()
+        acc.feed('{"to": "a@b.c", "body":')
+        assert acc.finalize() is None
+
+    def test_non_object_is_rejected(self):
+        acc = _JsonAccumulator()
+        acc.feed("[1, 2]")
+        assert acc.finalize() is None
+
+
+class TestDispatch:
+    def test_invalid_args_do_not_run_tool(self):
+        called = []
+
+        class Module:
+            @staticmethod
+            def handle(name, args):
+                called.append(name)
+                return "ran"
+
+        tool_map = {"send_email": ("gmail", Module, (), False)}
+        result = _dispatch_tool("send_email", None, tool_map, {})
+        assert called == []
+        assert result.startswith("Error:")
+
+
+def _chat_chunk(delta=None, finish_reason=None):
+    return {"choices": [{"delta": delta or {}, "finish_reason": finish_reason}]}
+
+
+class TestOpenAIChatStream:
+    def test_text(self, quiet_emit):
+        resp = FakeResp([
+            _chat_chunk({"content": "Hello"}),
+            _chat_chunk({"content": " there"}),
+            _chat_chunk(finish_reason="stop"),
+        ])
+        text, tool_calls, tool_args, finish_reason = _stream_openai_turn(resp)
+        assert text == "Hello there"
+        assert tool_calls == [] and tool_args == []
+        assert finish_reason == "stop"
+        assert "".join(e["text"] for e in quiet_emit if e["type"] == "text") == "Hello there"
+
+    def test_tool_call_deltas_are_merged(self):
+        resp = FakeResp([
+            _chat_chunk({"tool_calls": [{"index": 0, "id": "call_1", "function": {"name": "search", "arguments": '{"q":'}}]}),
+            _chat_chunk({"tool_calls": [{"index": 0, "function": {"arguments": ' "x"}'}}]}),
+            _chat_chunk(finish_reason="tool_calls"),
+        ])
+        _, tool_calls, tool_args, finish_reason = _stream_openai_turn(resp)
+        assert tool_calls[0]["id"] == "call_1"
+        assert tool_calls[0]["function"]["name"] == "search"
+        assert tool_args == [{"q": "x"}]
+        assert finish_reason == "tool_calls"
+
+    def test_length_cutoff(self):
+        resp = FakeResp([
+            _chat_chunk({"tool_calls": [{"index": 0, "id": "call_1", "function": {"name": "search", "arguments": '{"q": "x'}}]}),
+            _chat_chunk(finish_reason="length"),
+        ])
+        _, _, tool_args, finish_reason = _stream_openai_turn(resp)
+        assert tool_args == [None]
+        assert finish_reason == "length"
+
+
+class TestOpenAIResponsesStream:
+    def _call_events(self, arguments, output_index=0):
+        return [
+            {"type": "response.created", "response": {"id": "resp_1"}},
+            {"type": "response.output_item.added", "output_index": output_index,
+             "item": {"type": "function_call", "call_id": "call_1", "name": "search"}},
+            {"type": "response.function_call_arguments.delta", "output_index": output_index, "delta": arguments},
+        ]
+
+    def test_function_call(self):
+        resp = FakeResp(self._call_events('{"q": "x"}') + [
+            {"type": "response.completed", "response": {"id": "resp_1"}},
+        ])
+        response_id, calls, incomplete, output = _stream_openai_response(resp)
+        assert response_id == "resp_1"
+        assert calls == [("call_1", "search", {"q": "x"})]
+        assert incomplete is None
+        assert output == [{"type": "function_call", "call_id": "call_1", "name": "search", "arguments": '{"q": "x"}'}]
+
+    def test_text_before_call_is_kept_for_replay(self):
+        resp = FakeResp(self._call_events('{"q": "x"}', output_index=1) + [
+            {"type": "response.output_text.delta", "output_index": 0, "delta": "Let me "},
+            {"type": "response.output_text.delta", "output_index": 0, "delta": "check."},
+            {"type": "response.completed", "response": {"id": "resp_1"}},
+        ])
+        _, _, _, output = _stream_openai_response(resp)
+        assert [item.get("type", item.get("role")) for item in output] == ["assistant", "function_call"]
+        assert output[0]["content"] == "Let me check."
+
+    def test_incomplete(self):
+        resp = FakeResp(self._call_events('{"q": "x') + [
+            {"type": "response.incomplete",
+             "response": {"id": "resp_1", "incomplete_details": {"reason": "max_output_tokens"}}},
+        ])
+        _, calls, incomplete, _ = _stream_openai_response(resp)
+        assert calls == [("call_1", "search", None)]
+        assert incomplete == "max_output_tokens"
+
+    def test_error_event_message(self):
+        resp = FakeResp([{"type": "error", "code": "rate_limit_exceeded", "message": "Slow down"}])
+        with pytest.raises(RuntimeError, match="Slow down"):
+            _stream_openai_response(resp)
+
+    def test_failed_response_message(self):
+        resp = FakeResp([{"type": "response.failed", "response": {"id": "resp_1", "error": {"message": "Boom"}}}])
+        with pytest.raises(RuntimeError, match="Boom"):
+            _stream_openai_response(resp)
+
+
+class ErrorResp:
+    def __init__(self, status_code, error):
+        self.status_code = status_code
+        self.text = json.dumps({"error": error})
+        self.closed = False
+
+    def json(self):
+        return json.loads(self.text)
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TestResponsesFallback:
+    @pytest.mark.parametrize("status, error, expected", [
+        (400, {"code": "unsupported_model", "message": "not supported"}, True),
+        (404, {"code": None, "message": "Invalid URL (POST /v1/responses)"}, True),
+        (404, {"code": "model_not_found", "message": "no such model"}, False),
+        (400, {"code": "context_length_exceeded", "message": "too long"}, False),
+        (400, {"code": None, "param": "tools[0].parameters", "message": "bad schema"}, False),
+    ])
+    def test_only_unsupported_errors_fall_back(self, status, error, expected):
+        assert chat_agent._responses_unsupported(ErrorResp(status, error)) is expected
+
+    def test_bad_request_is_reported_not_remembered(self, quiet_emit, monkeypatch):
+        resp = ErrorResp(400, {"code": "context_length_exceeded", "message": "too long"})
+
+        class Session:
+            def post(self, url, **kwargs):
+                return resp
+
+        monkeypatch.setattr(chat_agent, "_http_session", lambda provider: Session())
+        ok = chat_agent._openai_responses_loop("gpt-test", {}, "sys", "hi", [], [], {}, {})
+        assert ok is False
+        assert "gpt-test" not in chat_agent._OPENAI_RESPONSES_UNSUPPORTED
+        assert quiet_emit[-1]["type"] == "error" and "too long" in quiet_emit[-1]["error"]
+        assert resp.closed
+
+
+class TestErrorResponsesAreClosed:
+    @pytest.fixture
+    def resp(self, monkeypatch):
+        resp = ErrorResp(500, {"message": "overloaded"})
+
+        class Session:
+            def post(self, url, **kwargs):
+                return resp
+
+        monkeypatch.setattr(chat_agent, "_http_session", lambda provider: Session())
+        return resp
+
+    def test_chat_completions(self, resp):
+        assert chat_agent._openai_chat_loop("gpt-test", {}, "sys", "hi", [], [], {}, {}) is False
+        assert resp.closed
+
+    def test_claude(self, resp, quiet_emit, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+        monkeypatch.setattr(chat_agent, "_provider_setup", lambda *args: ([], {}, "sys"))
+        chat_agent.run_claude("hi", [], {})
+        assert quiet_emit[-1]["type"] == "error" and "overloaded" in quiet_emit[-1]["error"]
+        assert resp.closed
+
+
+class StreamResp(FakeResp):
+    status_code = 200
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class TestResponsesReplay:
+    def test_account_argument_is_replayed(self, monkeypatch):
+        monkeypatch.delenv("CLAWFOUNDER_OPENAI_STORE", raising=False)
+        monkeypatch.setattr(chat_agent, "_index_async", lambda *args: None)
+        arguments = '{"query": "x", "account": "work"}'
+        turns = [
+            StreamResp([
+                {"type": "response.created", "response": {"id": "resp_1"}},
+                {"type": "response.output_item.added", "output_index": 0,
+                 "item": {"type": "function_call", "call_id": "call_1", "name": "mail_search"}},
+                {"type": "response.function_call_arguments.delta", "output_index": 0, "delta": arguments},
+                {"type": "response.completed", "response": {"id": "resp_1"}},
+            ]),
+            StreamResp([{"type": "response.completed", "response": {"id": "resp_2"}}]),
+        ]
+        bodies = []
+        handled = []
+
+        class Session:
+            def post(self, url, **kwargs):
+                bodies.append(json.loads(kwargs["data"]))
+                return turns[len(bodies) - 1]
+
+        class Module:
+            @staticmethod
+            def handle(name, args, account_id=None):
+                handled.append((args, account_id))
+                return "found"
+
+        tool_map = {"mail_search": ("mail", Module, [{"id": "work"}, {"id": "home"}], True)}
+        monkeypatch.setattr(chat_agent, "_http_session", lambda provider: Session())
+        assert chat_agent._openai_responses_loop("gpt-test", {}, "sys", "hi", [], [], tool_map, {}) is True
+
+        assert handled == [({"query": "x"}, "work")]
+        assert "previous_response_id" not in bodies[1]
+        replayed = [item for item in bodies[1]["input"] if item.get("type") == "function_call"]
+        assert replayed == [{"type": "function_call", "call_id": "call_1", "name": "mail_search", "arguments": arguments}]
+
+
+class TestGeminiStream:
+    def test_each_chunk_is_emitted_before_the_next_arrives(self, quiet_emit, monkeypatch):
+        def part(text):
+            return SimpleNamespace(thought=None, text=text, function_call=None)
+
+        chunks = [[part("Hel"), part("lo")], [part(" there")], [part("!")]]
+        texts_before_chunk = []
+
+        def generate_content_stream(**kwargs):
+            for parts in chunks:
+                texts_before_chunk.append(sum(e["type"] == "text" for e in quiet_emit))
+                yield SimpleNamespace(candidates=[
+                    SimpleNamespace(finish_reason=None, content=SimpleNamespace(parts=parts)),
+                ])
+
+        client = SimpleNamespace(models=SimpleNamespace(generate_content_stream=generate_content_stream))
+        types = SimpleNamespace(
+            Content=SimpleNamespace, Part=SimpleNamespace,
+            GenerateContentConfig=SimpleNamespace, ThinkingConfig=SimpleNamespace,
+        )
+        monkeypatch.setenv("GEMINI_API_KEY", "test")
+        monkeypatch.setattr(chat_agent, "_genai_types", lambda: types)
+        monkeypatch.setattr(chat_agent, "_gemini_client", lambda api_key: client)
+        monkeypatch.setattr(chat_agent, "_provider_setup", lambda *args: ([], {}, "sys"))
+        monkeypatch.setattr(chat_agent, "_gemini_tools", lambda all_tool_defs: None)
+        chat_agent.run_gemini("hi", [], {})
+
+        assert texts_before_chunk == [0, 1, 2]
+        assert [e["text"] for e in quiet_emit if e["type"] == "text"] == ["Hello", " there", "!"]
+
+
+class TestClaudeStream:
+    def _tool_events(self, partial_json, stop_reason):
+        return [
+            {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+            {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "Looking"}},
+            {"type": "content_block_stop", "index": 0},
+            {"type": "content_block_start", "index": 1,
+             "content_block": {"type": "tool_use", "id": "toolu_1", "name": "search", "input": {}}},
+            {"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": partial_json}},
+            {"type": "content_block_stop", "index": 1},
+            {"type": "message_delta", "delta": {"stop_reason": stop_reason}},
+        ]
+
+    def test_tool_use(self):
+        content, stop_reason, tool_args = _stream_claude_turn(FakeResp(self._tool_events('{"q": "x"}', "tool_use"), done=False))
+        assert content[0] == {"type": "text", "text": "Looking"}
+        assert content[1]["input"] == {"q": "x"}
+        assert tool_args == {"toolu_1": {"q": "x"}}
+        assert stop_reason == "tool_use"
+
+    def test_bad_input_is_not_parsed(self):
+        content, stop_reason, tool_args = _stream_claude_turn(FakeResp(self._tool_events('{"q": "x', "max_tokens"), done=False))
+        assert tool_args == {"toolu_1": None}
+        assert content[1]["input"] == {}
+        assert stop_reason == "max_tokens"
+
+
+class TestCaches:
+    def test_memo_put_is_bounded(self):
+        cache = {}
+        for i in range(chat_agent._MEMO_LIMIT + 5):
+            chat_agent._memo_put(cache, i, str(i))
+        assert len(cache) == chat_agent._MEMO_LIMIT
+        assert 0 not in cache and chat_agent._MEMO_LIMIT + 4 in cache
+
+    def test_account_tool_def_follows_reloaded_tools(self):
+        accounts = [{"id": "a", "label": "A"}, {"id": "b", "label": "B"}]
+        old = {"name": "t_reload", "description": "old", "parameters": {"type": "object", "properties": {}}}
+        new = {**old, "description": "new"}
+        assert chat_agent._with_account_param("conn", old, accounts)["description"] == "old"
+        assert chat_agent._with_account_param("conn", new, accounts)["description"] == "new"
+        assert chat_agent._with_account_param("conn", new, accounts)["parameters"]["required"] == ["account"]
+
+
+class TestLazyConnector:
+    @pytest.fixture
+    def folder(self, tmp_path, monkeypatch):
+        # The connector flips the env var when it executes; monkeypatch restores
+        # it, and the module it leaves in sys.modules is removed afterwards
+        monkeypatch.setenv("LAZY_PROBE_EXECUTED", "0")
+        monkeypatch.setattr(chat_agent, "_CONNECTOR_STAMPS", {})
+        folder = tmp_path / "lazy_probe"
+        folder.mkdir()
+        (folder / "connector.py").write_text(
+            "import os\n"
+            "os.environ['LAZY_PROBE_EXECUTED'] = '1'\n"
+            "TOOLS = [{'name': 'lazy_probe_tool', 'description': 'd', 'parameters': {}}]\n"
+            "def handle(name, args):\n"
+            "    return 'ok'\n"
+        )
+        yield folder
+        sys.modules.pop("connectors.lazy_probe.connector", None)
+
+    def _index(self, folder, has_is_connected):
+        return {folder.name: {
+            "stamp": chat_agent._connector_stamp(folder / "connector.py"),
+            "tools": [{"name": "lazy_probe_tool", "description": "d", "parameters": {}}],
+            "supports_multi": False,
+            "has_is_connected": has_is_connected,
+        }}
+
+    def test_index_hit_does_not_execute(self, folder):
+        info, index_entry = chat_agent._load_connector(folder, {}, self._index(folder, False))
+        assert isinstance(info["module"], chat_agent._LazyConnector)
+        assert index_entry is None
+        assert chat_agent.os.environ["LAZY_PROBE_EXECUTED"] == "0"
+
+    def test_first_tool_call_executes(self, folder):
+        info, _ = chat_agent._load_connector(folder, {}, self._index(folder, False))
+        assert info["module"].handle("lazy_probe_tool", {}) == "ok"
+        assert chat_agent.os.environ["LAZY_PROBE_EXECUTED"] == "1"
+
+    def test_is_connected_failure_keeps_the_index_entry(self, folder):
+        with (folder / "connector.py").open("a") as f:
+            f.write("def is_connected():\n    raise RuntimeError('token file unreadable')\n")
+        info, index_entry = chat_agent._load_connector(folder, {}, {})
+        assert info is None
+        assert index_entry["stamp"] == chat_agent._connector_stamp(folder / "connector.py")
+        assert index_entry["has_is_connected"] is True
+
+
+class TestConnectorIndex:
+    def test_write_leaves_no_temp_files(self, monkeypatch, tmp_path):
+        index_file = tmp_path / "cache" / "connectors.json"
+        monkeypatch.setattr(chat_agent, "_CONNECTOR_INDEX", index_file)
+        chat_agent._write_connector_index({"a": {"stamp": [1, 2]}})
+        chat_agent._write_connector_index({"b": {"stamp": [3, 4]}})
+        assert json.loads(index_file.read_text()) == {"b": {"stamp": [3, 4]}}
+        assert [p.name for p in index_file.parent.iterdir()] == ["connectors.json"]
+
+
+class TestBriefing:
+    def test_model_gets_str_of_each_result(self, monkeypatch, tmp_path):
+        nested = {"items": [{"body": "x" * 2500}] * 3}
+        module = type("BriefingAgent", (), {
+            "gather_data": staticmethod(lambda connectors, configs: {
+                "gmail": [{"tool": "gmail_get_unread", "result": nested}],
+            }),
+        })
+        spec = type("Spec", (), {"loader": type("Loader", (), {"exec_module": staticmethod(lambda m: None)})})
+        monkeypatch.setattr(chat_agent.importlib.util, "spec_from_file_location", lambda *a, **k: spec)
+        monkeypatch.setattr(chat_agent.importlib.util, "module_from_spec", lambda s: module)
+        monkeypatch.setenv("HOME", str(tmp_path))
+
+        summary = chat_agent._get_briefing({})
+        assert summary == "[gmail] gmail_get_unread (gmail):\n" + str(nested)[:3000]
+
+
+class TestEnvInt:
+    def test_default_when_unset(self, monkeypatch):
+        monkeypatch.delenv("CLAWFOUNDER_TEST_INT", raising=False)
+        assert chat_agent._env_int("CLAWFOUNDER_TEST_INT", 8) == 8
+
+    def test_parses_and_clamps(self, monkeypatch):
+        monkeypatch.setenv("CLAWFOUNDER_TEST_INT", " 3 ")
+        assert chat_agent._env_int("CLAWFOUNDER_TEST_INT", 8) == 3
+        monkeypatch.setenv("CLAWFOUNDER_TEST_INT", "0")
+        assert chat_agent._env_int("CLAWFOUNDER_TEST_INT", 8) == 1
+
+    def test_invalid_falls_back(self, monkeypatch):
+        monkeypatch.setenv("CLAWFOUNDER_TEST_INT", "ten")
+        assert chat_agent._env_int("CLAWFOUNDER_TEST_INT", 8) == 8
+
+
+class TestJsonlWriter:
+    class Stream:
+        def __init__(self):
+            self.writes = []
+
+        def write(self, data):
+            self.writes.append(bytes(data))
+
+        def flush(self):
+            pass
+
+    def test_small_writes_are_coalesced(self):
+        stream = self.Stream()
+        out = chat_agent._JsonlWriter(stream, window=60)
+        out.write(b'{"a": 1}\n')
+        out.write(b'{"b": 2}\n')
+        assert stream.writes == []
+        out.flush()
+        assert stream.writes == [b'{"a": 1}\n{"b": 2}\n']
+
+    @pytest.mark.parametrize("event_type", ["tool_call", "tool_result", "error", "done"])
+    def test_urgent_events_flush_immediately(self, event_type):
+        stream = self.Stream()
+        out = chat_agent._JsonlWriter(stream, window=60)
+        out.write(b"{}\n", urgent=event_type in chat_agent._URGENT_EVENTS)
+        assert stream.writes == [b"{}\n"]
+        out.close()
+
+    def test_tool_events_can_still_be_dropped(self, monkeypatch):
+        monkeypatch.setenv("CLAWFOUNDER_DROP_EVENTS", "tool_call,done")
+        assert chat_agent._drop_events() == {"tool_call"}
+
+
+class TestEmitText:
+    @pytest.fixture
+    def out(self):
+        sink = io.BytesIO()
+        token = chat_agent._OUTPUT.set(chat_agent._JsonlWriter(sink))
+        yield sink
+        chat_agent._OUTPUT.reset(token)
+
+    def _lines(self, sink):
+        chat_agent._OUTPUT.get().flush()
+        return sink.getvalue().splitlines()
+
+    def test_ascii(self, out):
+        emit_text('say "hi"')
+        assert [json.loads(line) for line in self._lines(out)] == [{"type": "text", "text": 'say "hi"'}]
+
+    def test_non_ascii_is_escaped_and_serialized_once(self, out, monkeypatch):
+        calls = []
+        if chat_agent.orjson:
+            monkeypatch.setattr(chat_agent.orjson, "dumps", lambda *a, **k: calls.append(a))
+        emit_text("caf\u00e9 \u2615")
+        [line] = self._lines(out)
+        assert line.isascii()
+        assert json.loads(line) == {"type": "text", "text": "caf\u00e9 \u2615"}
+        assert calls == []
+
+    def test_dumps_line_escapes_nested_text(self):
+        line = chat_agent._dumps_line({"type": "tool_result", "result": {"title": "na\u00efve"}})
+        assert line.isascii()
+        assert json.loads(line)["result"] == {"title": "na\u00efve"}
+
+
+class TestHttpSession:
+    def test_one_session_per_provider(self, monkeypatch):
+        pytest.importorskip("requests")
+        monkeypatch.setattr(chat_agent, "_HTTP_SESSIONS", {})
+        session = chat_agent._http_session("openai")
+        assert chat_agent._http_session("openai") is session
+        assert chat_agent._http_session("claude") is not session
+
+
+class TestHttpRetry:
+    def test_read_errors_are_not_retried(self, monkeypatch):
+        exceptions = pytest.importorskip("urllib3.exceptions")
+        monkeypatch.setattr(chat_agent, "_HTTP_SESSIONS", {})
+
+        retry = chat_agent._http_session("openai").get_adapter("https://api.openai.com/").max_retries
+        with pytest.raises(exceptions.MaxRetryError):
+            retry.increment("POST", "/v1/responses", error=exceptions.ReadTimeoutError(None, "/", "timed out"))
+        assert retry.increment("POST", "/v1/responses", error=exceptions.ConnectTimeoutError()).total == 1
+
+
+class TestIndexing:
+    def test_every_result_is_indexed(self, monkeypatch):
+        import knowledge_base
+        from concurrent.futures import ThreadPoolExecutor
+
+        indexed = []
+        monkeypatch.setattr(knowledge_base, "index", lambda *args: indexed.append(args))
+        pool = ThreadPoolExecutor(max_workers=2)
+        monkeypatch.setattr(chat_agent, "_INDEX_POOL", pool)
+        for i in range(100):
+            chat_agent._index_async("conn", "tool", f"result {i}")
+        pool.shutdown(wait=True)
+        assert len(indexed) == 100
@@ -0,0 +1,195 @@
+"""Chat agent daemon tests."""
+
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import chat_agent
+import chat_agent_server
+from chat_agent_server import _EnvGate
+
+
+class Sink(io.BytesIO):
+    """Byte stream standing in for stdout or the client socket."""
+
+    def events(self):
+        return [json.loads(line) for line in self.getvalue().splitlines() if line.strip()]
+
+
+def _out():
+    sink = Sink()
+    return sink, chat_agent._JsonlWriter(sink)
+
+
+def _request(message="hi", provider="gemini"):
+    return json.dumps({"message": message, "provider": provider}).encode()
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    """Replace the Gemini run with one that emits text and runs two tools in parallel."""
+    monkeypatch.setattr(chat_agent, "load_all_connectors", lambda: {})
+    monkeypatch.setattr(chat_agent, "_warm_imports", lambda provider: None)
+
+    class Module:
+        @staticmethod
+        def handle(name, args):
+            chat_agent.emit({"type": "thinking", "text": f"in {name}"})  # From a tool-pool worker
+            time.sleep(0.05)
+            return f"{name}:{os.environ.get('CLAWFOUNDER_TEST_TOKEN')}"
+
+    def run(message, history, connectors):
+        chat_agent.emit({"type": "thinking", "text": "working"})
+        chat_agent.emit_text(message)
+        tool_map = {"t_a": ("fake", Module, (), False), "t_b": ("fake", Module, (), False)}
+        chat_agent._run_tool_calls([("t_a", {}), ("t_b", {})], tool_map, {})
+
+    monkeypatch.setitem(chat_agent._PROVIDERS, "gemini", run)
+    return run
+
+
+class TestRunRequest:
+    def test_events_go_to_the_given_output(self, fake_provider, monkeypatch):
+        stdout, stdout_writer = _out()
+        monkeypatch.setattr(chat_agent, "_stdout", stdout_writer)
+        sink, out = _out()
+        chat_agent.run_request(_request("hello"), out)
+        out.close()
+        stdout_writer.close()
+
+        types = [e["type"] for e in sink.events()]
+        assert types.count("tool_call") == 2 and types.count("tool_result") == 2
+        assert {"type": "text", "text": "hello"} in sink.events()
+        assert {"type": "thinking", "text": "in t_b"} in sink.events()
+        assert types[-1] == "done"
+        assert stdout.getvalue() == b""
+
+    def test_drop_set_is_per_request(self, fake_provider, monkeypatch):
+        monkeypatch.setenv("CLAWFOUNDER_DROP_EVENTS", "thinking,tool_call")
+        before = chat_agent._EMIT_DROP.get()
+        sink, out = _out()
+        chat_agent.run_request(_request(), out)
+        out.close()
+
+        types = [e["type"] for e in sink.events()]
+        assert "thinking" not in types and "tool_call" not in types  # Workers included
+        assert "tool_result" in types
+        assert chat_agent._EMIT_DROP.get() == before
+
+    def test_failed_turn_still_ends_with_done(self, monkeypatch):
+        def run(message, history, connectors):
+            chat_agent.emit({"type": "error", "error": "ANTHROPIC_API_KEY not set"})
+
+        monkeypatch.setitem(chat_agent._PROVIDERS, "gemini", run)
+        sink, out = _out()
+        chat_agent.run_request(_request(), out)
+        out.close()
+
+        assert [e["type"] for e in sink.events()][-2:] == ["error", "done"]
+
+
+class TestEnvGate:
+    def _enter_in_thread(self, gate, env, entered):
+        def run():
+            gate.enter(env)
+            entered.set()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def test_same_env_runs_concurrently(self, monkeypatch):
+        monkeypatch.setattr(chat_agent_server, "_apply_env", lambda env: None)
+        gate = _EnvGate()
+        gate.enter({"K": "1"})
+        entered = threading.Event()
+        self._enter_in_thread(gate, {"K": "1"}, entered)
+        assert entered.wait(1)
+        gate.leave()
+        gate.leave()
+
+    def test_different_env_waits_for_running_chats(self, monkeypatch):
+        applied = []
+        monkeypatch.setattr(chat_agent_server, "_apply_env", applied.append)
+        gate = _EnvGate()
+        gate.enter({"K": "1"})
+        entered = threading.Event()
+        self._enter_in_thread(gate, {"K": "2"}, entered)
+        assert not entered.wait(0.1)
+        assert applied == [{"K": "1"}]
+
+        gate.leave()
+        assert entered.wait(1)
+        assert applied == [{"K": "1"}, {"K": "2"}]
+        gate.leave()
+
+    def test_later_requests_queue_behind_an_env_change(self, monkeypatch):
+        monkeypatch.setattr(chat_agent_server, "_apply_env", lambda env: None)
+        gate = _EnvGate()
+        gate.enter({"K": "1"})
+        switched, same = threading.Event(), threading.Event()
+        self._enter_in_thread(gate, {"K": "2"}, switched)
+        time.sleep(0.05)
+        self._enter_in_thread(gate, {"K": "1"}, same)
+        assert not same.wait(0.1)  # Admitting it would starve the env change
+
+        gate.leave()
+        assert switched.wait(1)
+        assert not same.wait(0.1)
+        gate.leave()
+        assert same.wait(1)
+        gate.leave()
+
+
+class TestApplyEnv:
+    def test_env_change_drops_connector_and_prompt_caches(self, monkeypatch):
+        monkeypatch.delenv("CLAWFOUNDER_TEST_TOKEN", raising=False)
+        monkeypatch.setattr(chat_agent, "_LOADED_CONNECTORS", ("key", 0.0, {}))
+        monkeypatch.setitem(chat_agent._SYS_PROMPT_CACHE, "key", "prompt")
+
+        chat_agent_server._apply_env(dict(os.environ))
+        assert chat_agent._LOADED_CONNECTORS is not None  # Same env, caches stay
+
+        chat_agent_server._apply_env({**os.environ, "CLAWFOUNDER_TEST_TOKEN": "new"})
+        assert chat_agent._LOADED_CONNECTORS is None
+        assert "key" not in chat_agent._SYS_PROMPT_CACHE
+
+
+class TestForwarding:
+    @pytest.fixture
+    def daemon(self, monkeypatch, fake_provider):
+        # AF_UNIX paths are short, so stay out of pytest's deep tmp_path
+        sock_dir = tempfile.mkdtemp(prefix="cf-", dir="/tmp")
+        sock_path = Path(sock_dir) / "agent.sock"
+        monkeypatch.setattr(chat_agent, "DAEMON_SOCKET", sock_path)
+        monkeypatch.setattr(chat_agent_server, "_ENV_GATE", _EnvGate())
+        monkeypatch.delenv("CLAWFOUNDER_NO_DAEMON", raising=False)
+        monkeypatch.setenv("CLAWFOUNDER_TEST_TOKEN", "from-client")
+        server = chat_agent_server._Server(str(sock_path), chat_agent_server._Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield server
+        server.shutdown()
+        server.server_close()
+        sock_path.unlink(missing_ok=True)
+        os.rmdir(sock_dir)
+
+    def test_round_trip(self, daemon, monkeypatch):
+        stdout, stdout_writer = _out()
+        monkeypatch.setattr(chat_agent, "_stdout", stdout_writer)
+        assert chat_agent._forward_to_daemon(_request("via daemon"))
+        stdout_writer.close()
+
+        events = stdout.getvalue().splitlines()
+        parsed = [json.loads(line) for line in events]
+        assert {"type": "text", "text": "via daemon"} in parsed
+        results = [e["result"] for e in parsed if e["type"] == "tool_result"]
+        assert sorted(results) == ["t_a:from-client", "t_b:from-client"]
+        assert parsed[-1]["type"] == "done"
+
+    def test_no_daemon(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(chat_agent, "DAEMON_SOCKET", tmp_path / "missing.sock")
+        assert chat_agent._forward_to_daemon(_request()) is False
@@ -18,6 +18,19 @@ from pathlib import Path
 # Max tools to send to the main model
 MAX_TOOLS = 25
 
+
+# Tool sets this small are sent whole — a router round trip costs more than
+# the extra tool declarations do
+def _route_min_tools():
+    """CLAWFOUNDER_ROUTE_MIN_TOOLS, read per call so the chat daemon sees changes."""
+    raw = os.environ.get("CLAWFOUNDER_ROUTE_MIN_TOOLS", "").strip()
+    try:
+        return int(raw) if raw else MAX_TOOLS
+    except ValueError:
+        _log(f"Ignoring CLAWFOUNDER_ROUTE_MIN_TOOLS={raw!r} (not an integer)")
+        return MAX_TOOLS
+
+
 # Models to try for routing (in order of preference — cheapest first)
 ROUTER_MODELS = [
     "gemini-2.5-flash-lite",
@@ -40,6 +53,23 @@ Return ONLY a JSON array of tool name strings. Rules:
 - Return valid JSON array, nothing else"""
 
 
+# Replies made up only of these words are confirmations like "yes, send it" —
+# they carry no routing signal, so the router call is skipped.
+_CONFIRM_WORDS = frozenset([
+    "yes", "yep", "yeah", "yup", "y", "send", "go", "ahead", "do", "it", "ok", "okay",
+    "sure", "confirm", "confirmed", "please", "both", "all", "that", "them",
+    "no", "nope", "cancel", "stop", "thanks", "thank", "you", "great", "perfect",
+])
+
+_PUNCTUATION = str.maketrans({c: " " for c in ".,!?;:'\"()"})
+
+
+def _is_confirmation(message):
+    """True if every word of the message is a confirmation/cancel word."""
+    tokens = message.lower().translate(_PUNCTUATION).split()
+    return bool(tokens) and all(t in _CONFIRM_WORDS for t in tokens)
+
+
 def _log(msg):
     print(f"[router] {msg}", file=sys.stderr, flush=True)
 
@@ -55,6 +85,10 @@ def _build_manifest(connectors):
     return "\n".join(lines)
 
 
+# genai.Client per API key
+_CLIENTS = {}
+
+
 def _call_router(message, manifest, api_key):
     """Call a fast LLM to pick relevant tools. Returns list of tool names or None on failure."""
     try:
@@ -66,7 +100,11 @@ def _call_router(message, manifest, api_key):
     if not api_key:
         return None
 
-    client = genai.Client(api_key=api_key)
+    # Client construction resolves credentials and sets up its HTTP pool, so
+    # reuse it (the chat daemon routes many messages per process)
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        client = _CLIENTS[api_key] = genai.Client(api_key=api_key)
 
     prompt = ROUTER_PROMPT.format(
         manifest=manifest,
@@ -159,12 +197,22 @@ def route(message, connectors, api_key=None):
     """
     # Not worth routing for small connector sets
     total_tools = sum(len(info["module"].TOOLS) for info in connectors.values())
-    if total_tools <= MAX_TOOLS:
+    if total_tools <= _route_min_tools():
         return None  # All tools are fine
 
+    # Confirmation turns need whatever tool the previous turn proposed —
+    # keep the full tool set rather than paying for a meaningless route.
+    if _is_confirmation(message):
+        _log("Confirmation reply, skipping router")
+        return None
+
     # Check cache first
     import tool_cache
-    cache_key = hashlib.md5(message.lower().strip().encode()).hexdigest()[:12]
+    # Keyed on the connector set too, so a cached route never points at
+    # tools from connectors that have since been disconnected
+    cache_key = hashlib.md5(
+        (" ".join(message.lower().split()) + "\0" + ",".join(sorted(connectors))).encode()
+    ).hexdigest()[:12]
     cached = tool_cache.get("_router", {"q": cache_key}, connector="_router")
     if cached:
         try: